@@ -0,0 +1,81 @@
+# Load test for request coalescing: many sessions send the same request at the same moment
+# (e.g. a whole class generating the same subject quiz) and the fake model counts the upstream calls.
+#
+#   python benchmarks/load_test.py --clients 200 --latency 0.5
+import argparse
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.run_benchmarks import benchmark_responder  # noqa: E402
+from student_helper import llm, quizzes, response_cache, scheduler  # noqa: E402
+from student_helper.fake_model import FakeGenerativeModel  # noqa: E402
+
+
+# Function to run `request(client)` for every client at the same moment; returns (results, errors, seconds)
+def run_clients(clients, request):
+    barrier = threading.Barrier(clients)
+    results, errors = [None] * clients, []
+
+    def client(index):
+        barrier.wait()
+        try:
+            results[index] = request(index)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors, time.perf_counter() - started
+
+
+# Function to collect every question of a quiz started by one client
+def take_quiz(model):
+    questions = []
+    running = quizzes.start_quiz(model, "Generate a quiz about Biology", "Intermediate")
+    while running:
+        running, _ = quizzes.collect_batches(running, questions)
+        time.sleep(0.01)
+    return len(questions)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=200, help="simultaneous sessions")
+    parser.add_argument("--latency", type=float, default=0.5, help="fake model seconds to first token")
+    args = parser.parse_args()
+
+    scheduler.set_scheduler(scheduler.CallScheduler(rpm=10 ** 6, tpm=10 ** 9))
+    scenarios = [
+        # (name, request, upstream calls expected)
+        ("identical text", lambda model, i: llm.generate_text(model, "Explain photosynthesis.", mode="chat"), 1),
+        ("identical stream", lambda model, i: "".join(llm.stream_text(model, "Explain osmosis.", mode="chat")), 1),
+        ("identical quiz", lambda model, i: take_quiz(model),
+         -(-quizzes.DEFAULT_QUESTIONS // quizzes.DEFAULT_BATCH_SIZE)),
+        ("distinct text", lambda model, i: llm.generate_text(model, f"Explain topic {i}.", mode="chat"), args.clients),
+    ]
+
+    failed = False
+    for name, request, expected in scenarios:
+        response_cache.set_cache(response_cache.MemoryCache())
+        model = FakeGenerativeModel(latency=args.latency, chunk_delay=0.01, responder=benchmark_responder)
+        results, errors, seconds = run_clients(args.clients, lambda i: request(model, i))
+        calls = len(model.prompts)
+        consistent = len({str(result) for result in results}) == 1 or name.startswith("distinct")
+        ok = calls == expected and not errors and consistent
+        failed = failed or not ok
+        print(f"{name:18} clients {args.clients:4}  upstream calls {calls:4} (expected {expected})  "
+              f"errors {len(errors)}  {seconds:6.2f}s  {'ok' if ok else 'FAILED'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
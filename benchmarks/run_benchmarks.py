@@ -0,0 +1,334 @@
+"""Offline benchmarks for the Student Helper app.
+
+Every feature is driven through Streamlit's AppTest harness against a deterministic fake Gemini model,
+using synthetic PDFs, EPUBs and CSVs of increasing size. Results are written as JSON for comparison.
+
+  python benchmarks/run_benchmarks.py --sizes small,medium --output benchmark_results.json
+  python benchmarks/run_benchmarks.py --compare old_results.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep the benchmarks self-contained: no cache file, no webhook traffic
+os.environ["RESPONSE_CACHE_BACKEND"] = "memory"
+os.environ["ZAPIER_WEBHOOK_URL"] = "http://127.0.0.1:9/"
+os.environ["ZAPIER_SPOOL_PATH"] = os.path.join(ROOT, ".cache", "benchmark_spool.json")
+
+import google.generativeai as genai  # noqa: E402
+import streamlit as st  # noqa: E402
+from streamlit.proto.Common_pb2 import FileURLs as FileURLsProto  # noqa: E402
+from streamlit.runtime.uploaded_file_manager import UploadedFile, UploadedFileRec  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from benchmarks import synthetic  # noqa: E402
+from student_helper import (document_store, epub_extraction, memory_governor, pdf_extraction, response_cache,  # noqa: E402
+                            scheduler, translation)
+from student_helper.fake_model import FakeGenerativeModel, default_responder  # noqa: E402
+from student_helper.tokens import estimate_tokens  # noqa: E402
+
+CHATBOT = os.path.join(ROOT, "chatbot.py")
+EPUB_CONVERTER = os.path.join(ROOT, "pages", "Epub_Converter.py")
+
+# Input sizes for each data type
+SIZES = {
+    "small": {"pdf_pages": 10, "epub_chapters": 10, "csv_rows": 1000, "paragraphs": 5, "comments": 200},
+    "medium": {"pdf_pages": 100, "epub_chapters": 50, "csv_rows": 100000, "paragraphs": 50, "comments": 5000},
+    "large": {"pdf_pages": 500, "epub_chapters": 200, "csv_rows": 1000000, "paragraphs": 200, "comments": 50000},
+}
+
+
+# Function to wrap synthetic bytes as the UploadedFile Streamlit would hand to the script
+def make_fake_upload(name, mime_type, data):
+    return UploadedFile(UploadedFileRec(f"benchmark-{name}", name, mime_type, data), FileURLsProto())
+
+
+_current_upload = {"file": None}
+
+
+# Function to replace st.file_uploader (AppTest can't upload files): returns the current synthetic file(s)
+def fake_file_uploader(label, type=None, *args, **kwargs):
+    upload = _current_upload["file"]
+    if upload is None:
+        return None
+    uploads = upload if isinstance(upload, list) else [upload]
+    extensions = [type] if isinstance(type, str) else list(type or [])
+    if extensions:
+        uploads = [file for file in uploads if file.name.rsplit(".", 1)[-1] in extensions]
+    if kwargs.get("accept_multiple_files"):
+        return uploads
+    return uploads[0] if uploads else None
+
+
+LABEL_CYCLE = ["positive", "negative", "neutral"]
+
+
+# Function to answer quiz, bulk sentiment and batched translation prompts in their formats and everything else with the default fake text
+def benchmark_responder(prompt):
+    if "each numbered text" in prompt:
+        ids = re.findall(r"^(\d+)\. ", prompt.split("Texts:", 1)[-1], re.MULTILINE)
+        return json.dumps({"results": [
+            {"id": int(n), "label": LABEL_CYCLE[int(n) % 3], "explanation": "Synthetic label."} for n in ids
+        ]})
+    if "Reply with JSON only" in prompt:
+        batch = re.search(r"question set (\d+)", prompt)
+        batch = batch.group(1) if batch else "1"
+        count = int(re.search(r"Generate (\d+)", prompt).group(1)) if re.search(r"Generate (\d+)", prompt) else 5
+        return json.dumps({"questions": [
+            {"question": f"Question {batch}.{i}?", "options": {letter: f"Option {letter}" for letter in "ABCD"}, "answer": "A"}
+            for i in range(count)
+        ]})
+    if "numbered segment" in prompt:
+        return "\n".join(f"<{n}>[translated] {segment}</{n}>" for n, segment in re.findall(r"<(\d+)>(.*?)</\1>", prompt, re.DOTALL))
+    return default_responder(prompt)
+
+
+# Function to find a widget by label
+def _widget(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    raise LookupError(f"no widget labelled {label!r}")
+
+
+# Function to hold a multi-turn conversation (each message a different slice of the text)
+def _chat_turns(at, text, turns):
+    words = text.split()
+    for turn in range(turns):
+        at.chat_input[0].set_value(f"Message {turn}: " + " ".join(words[turn * 40:turn * 40 + 120])).run()
+    return at
+
+
+# Feature scenarios: (feature name, script, page selection, upload builder, interaction)
+def _scenarios(size):
+    sizes = SIZES[size]
+    text = synthetic.make_text(sizes["paragraphs"])
+    pdf = lambda: make_fake_upload("book.pdf", "application/pdf", synthetic.make_pdf(sizes["pdf_pages"]))
+    epub = lambda: make_fake_upload("book.epub", "application/epub+zip", synthetic.make_epub(sizes["epub_chapters"]))
+    csv = lambda: make_fake_upload("data.csv", "text/csv", synthetic.make_csv(sizes["csv_rows"]))
+    # Four books, two of each kind, and a damaged file that must not stop the batch
+    batch = lambda: [
+        make_fake_upload("book1.pdf", "application/pdf", synthetic.make_pdf(sizes["pdf_pages"], seed=1)),
+        make_fake_upload("book2.pdf", "application/pdf", synthetic.make_pdf(sizes["pdf_pages"], seed=2)),
+        make_fake_upload("book3.epub", "application/epub+zip", synthetic.make_epub(sizes["epub_chapters"], seed=3)),
+        make_fake_upload("book4.epub", "application/epub+zip", synthetic.make_epub(sizes["epub_chapters"], seed=4)),
+        make_fake_upload("damaged.pdf", "application/pdf", b"%PDF-1.4 not really a pdf"),
+    ]
+    comments = lambda: make_fake_upload("survey.csv", "text/csv", synthetic.make_comments(sizes["comments"]))
+    # Notes that fit the quiz budget as they are (the stored text itself is cached and reused)
+    notes = lambda: make_fake_upload("notes.txt", "text/plain", "\n".join(text.split("\n")[:20]).encode("utf-8"))
+
+    return [
+        ("Document Q&A", CHATBOT, "Document Q&A", pdf,
+         lambda at: _widget(at.text_input, "Ask a question about the file uploaded📁:").input("What does the text say about energy?").run()),
+        ("Summarization", CHATBOT, "Summarization", pdf,
+         lambda at: _widget(at.button, "Summarize Document").click().run()),
+        ("Quiz Generation", CHATBOT, "Quiz Generation", pdf,
+         lambda at: _widget(at.button, "Generate Quiz").click().run()),
+        ("Quiz (notes)", CHATBOT, "Quiz Generation", notes,
+         lambda at: _widget(_widget(at.button, "Generate Quiz").click().run().button, "Generate Quiz").click().run()),
+        ("Int. Quiz (notes)", CHATBOT, "Interactive Quiz", notes,
+         lambda at: _widget(at.button, "Generate Quiz").click().run()),
+        ("Interactive Quiz", CHATBOT, "Interactive Quiz", None,
+         lambda at: _widget(_widget(at.radio, "Choose quiz source:").set_value("Generate from Subject").run().button,
+                            "Generate Quiz").click().run()),
+        ("Sentiment Analysis", CHATBOT, "Sentiment Analysis", None,
+         lambda at: _widget(_widget(at.text_area, "Enter text for sentiment analysis:").input(text).run().button,
+                            "Analyze Sentiment").click().run()),
+        ("Bulk Sentiment", CHATBOT, "Sentiment Analysis", comments,
+         lambda at: _widget(_widget(_widget(at.radio, "Analyze").set_value("Dataset (CSV/TXT)").run().selectbox,
+                                    "Column to analyze").set_value("comment").run().button,
+                            "Analyze Dataset").click().run()),
+        ("Translator", CHATBOT, "Translator", None,
+         lambda at: _widget(_widget(at.text_area, "Please type your text that you want to translate").input(text).run().button,
+                            "Translate").click().run()),
+        ("General Chatbot", CHATBOT, "General Chatbot", None,
+         lambda at: at.chat_input[0].set_value(text[:500]).run()),
+        ("Chatbot (20 turns)", CHATBOT, "General Chatbot", None, lambda at: _chat_turns(at, text, 20)),
+        ("Data Visualization", CHATBOT, "Data Visualization", csv,
+         lambda at: _widget(_widget(at.radio, "Select chart type").set_value("Line").run().button,
+                            "Generate Visualization").click().run()),
+        ("EPUB conversion", EPUB_CONVERTER, None, epub,
+         lambda at: _widget(at.button, "Convert and Download as TXT🖹").click().run()),
+        ("Batch conversion", EPUB_CONVERTER, None, batch,
+         lambda at: _widget(at.button, "Convert all and Download as ZIP🗜").click().run()),
+    ]
+
+
+# Function to run `measure()` and get the peak of Python memory allocated meanwhile, in MB.
+# Tracing slows allocation down, so this is kept out of the timed runs.
+def peak_memory_mb(measure):
+    tracemalloc.start()
+    try:
+        measure()
+        return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+
+
+# Function to compute a percentile of a list of numbers
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+# Function to run one feature scenario once from a cold cache; returns (seconds, prompts sent)
+def _run_once(model, name, script, feature, upload, interact):
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    response_cache.set_cache(response_cache.MemoryCache())
+    translation.set_memory(translation.TranslationMemory(":memory:"))
+    store_path = tempfile.mkdtemp(prefix="benchmark-documents-")
+    document_store.set_store(document_store.DocumentStore(store_path))
+    memory_governor.set_governor(memory_governor.MemoryGovernor())
+    model.prompts.clear()
+    _current_upload["file"] = upload
+
+    try:
+        at = AppTest.from_file(script, default_timeout=600)
+        at.run()
+        if feature:
+            at.sidebar.selectbox[0].select(feature).run()
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception[0].message}")
+        started = time.perf_counter()
+        at = interact(at)
+        seconds = time.perf_counter() - started
+    finally:
+        shutil.rmtree(store_path, ignore_errors=True)
+    if at.exception:
+        raise RuntimeError(f"{name}: {at.exception[0].message}")
+    return seconds, list(model.prompts)
+
+
+# Function to run one feature scenario several times from a cold cache, plus one untimed run for its peak memory
+def run_scenario(model, name, script, feature, make_upload, interact, repeat):
+    upload = make_upload() if make_upload else None
+    latencies, prompts = [], []
+    for _ in range(repeat):
+        seconds, prompts = _run_once(model, name, script, feature, upload, interact)
+        latencies.append(seconds)
+    peak = peak_memory_mb(lambda: _run_once(model, name, script, feature, upload, interact))
+
+    return {
+        "feature": name,
+        "input_bytes": sum(file.size for file in upload) if isinstance(upload, list) else upload.size if upload else 0,
+        "runs": repeat,
+        "p50_seconds": percentile(latencies, 0.5),
+        "p95_seconds": percentile(latencies, 0.95),
+        "model_calls": len(prompts),
+        "max_prompt_chars": max(map(len, prompts), default=0),
+        "max_prompt_tokens": max(map(estimate_tokens, prompts), default=0),
+        "total_prompt_tokens": sum(map(estimate_tokens, prompts)),
+        "peak_memory_mb": peak,
+    }
+
+
+# Function to measure raw extraction throughput outside of Streamlit
+def run_extraction(size):
+    sizes = SIZES[size]
+    results = []
+
+    pdf = synthetic.make_pdf(sizes["pdf_pages"])
+    started = time.perf_counter()
+    pages = pdf_extraction.extract_pages(pdf)
+    seconds = time.perf_counter() - started
+    results.append({"format": "pdf", "pages": len(pages), "input_bytes": len(pdf), "seconds": seconds,
+                    "pages_per_second": len(pages) / seconds,
+                    "peak_memory_mb": peak_memory_mb(lambda: pdf_extraction.extract_pages(pdf))})
+
+    epub = synthetic.make_epub(sizes["epub_chapters"])
+    started = time.perf_counter()
+    characters = sum(len(text) for text in epub_extraction.iter_epub_text(epub))
+    seconds = time.perf_counter() - started
+    results.append({"format": "epub", "chapters": sizes["epub_chapters"], "input_bytes": len(epub), "seconds": seconds,
+                    "megabytes_per_second": len(epub) / seconds / 1e6, "characters": characters,
+                    "peak_memory_mb": peak_memory_mb(lambda: sum(map(len, epub_extraction.iter_epub_text(epub))))})
+    return results
+
+
+# Function to print p50 changes against an earlier results file
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {(s["size"], s["feature"]): s for s in baseline.get("scenarios", [])}
+    regressions = 0
+    print(f"\n{'size':8} {'feature':22} {'old p50':>9} {'new p50':>9} {'change':>8}")
+    for scenario in results["scenarios"]:
+        old = previous.get((scenario["size"], scenario["feature"]))
+        if not old:
+            continue
+        change = scenario["p50_seconds"] / old["p50_seconds"] - 1 if old["p50_seconds"] else 0.0
+        flag = "  REGRESSION" if change > threshold else ""
+        regressions += bool(flag)
+        print(f"{scenario['size']:8} {scenario['feature']:22} {old['p50_seconds']:9.3f} "
+              f"{scenario['p50_seconds']:9.3f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="small,medium", help="comma-separated: " + ",".join(SIZES))
+    parser.add_argument("--features", default="", help="comma-separated feature names (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per scenario")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake model seconds to first token")
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="fake model seconds between streamed chunks")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="earlier results file to compare p50 latencies against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative p50 increase reported as a regression")
+    args = parser.parse_args()
+
+    # Clearing st.cache_data outside a server logs a warning on every run
+    logging.getLogger("streamlit.runtime.caching.cache_data_api").setLevel(logging.ERROR)
+    model = FakeGenerativeModel(latency=args.latency, chunk_delay=args.chunk_delay, responder=benchmark_responder)
+    genai.GenerativeModel = lambda *a, **kwargs: model
+    st.file_uploader = fake_file_uploader
+    scheduler.set_scheduler(scheduler.CallScheduler(rpm=10 ** 6, tpm=10 ** 9))
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    results = {
+        "meta": {"commit": commit, "python": platform.python_version(), "platform": platform.platform(),
+                 "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "fake_latency": args.latency,
+                 "fake_chunk_delay": args.chunk_delay, "repeat": args.repeat},
+        "scenarios": [],
+        "extraction": [],
+    }
+    wanted = {name.strip() for name in args.features.split(",") if name.strip()}
+
+    for size in [s.strip() for s in args.sizes.split(",") if s.strip()]:
+        for extraction in run_extraction(size):
+            results["extraction"].append(dict(extraction, size=size))
+        for name, script, feature, make_upload, interact in _scenarios(size):
+            if wanted and name not in wanted:
+                continue
+            scenario = dict(run_scenario(model, name, script, feature, make_upload, interact, args.repeat), size=size)
+            results["scenarios"].append(scenario)
+            print(f"{size:8} {name:22} p50 {scenario['p50_seconds']:7.3f}s  p95 {scenario['p95_seconds']:7.3f}s  "
+                  f"calls {scenario['model_calls']:3}  max prompt {scenario['max_prompt_tokens']:7} tokens  "
+                  f"memory {scenario['peak_memory_mb']:7.1f} MB")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# Synthetic PDFs, EPUBs and CSVs of any size for the offline benchmarks
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+WORDS = ("cell energy protein membrane photosynthesis enzyme nucleus molecule reaction gene "
+         "theory equation force motion history trade empire climate river market policy").split()
+
+
+# Function to build deterministic prose from a seed
+def make_text(paragraphs, seed=0, words_per_paragraph=80):
+    rng = np.random.default_rng(seed)
+    return "\n\n".join(
+        " ".join(rng.choice(WORDS, words_per_paragraph)).capitalize() + "."
+        for _ in range(paragraphs)
+    )
+
+
+# Function to build a PDF with one text stream per page (written by hand, no PDF library needed)
+def make_pdf(pages, lines_per_page=40, seed=0):
+    rng = np.random.default_rng(seed)
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page in range(pages):
+        lines = [f"Page {page + 1}. " + " ".join(rng.choice(WORDS, 10)) for _ in range(lines_per_page)]
+        body = "BT /F1 10 Tf 12 TL 50 780 Td " + " ".join(f"({line}) '" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(body)} >>\nstream\n{body}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {pages} >>"
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1"))
+    xref = output.tell()
+    output.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1"))
+    for offset in offsets:
+        output.write(f"{offset:010d} 00000 n \n".encode("latin-1"))
+    output.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1"))
+    return output.getvalue()
+
+
+# Function to build an EPUB with the given number of chapters
+def make_epub(chapters, paragraphs_per_chapter=30, seed=0):
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(zipfile.ZipInfo("mimetype"), "application/epub+zip")
+        archive.writestr("META-INF/container.xml",
+                         '<?xml version="1.0"?><container version="1.0" '
+                         'xmlns="urn:oasis:names:tc:opendocument:xmlns:container"><rootfiles>'
+                         '<rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>'
+                         '</rootfiles></container>')
+        manifest, spine = [], []
+        for chapter in range(chapters):
+            paragraphs = make_text(paragraphs_per_chapter, seed=seed + chapter).split("\n\n")
+            html = (f"<html><head><title>Chapter {chapter + 1}</title></head><body><h1>Chapter {chapter + 1}</h1>"
+                    + "".join(f"<p>{paragraph}</p>" for paragraph in paragraphs) + "</body></html>")
+            archive.writestr(f"OEBPS/chapter{chapter}.xhtml", html)
+            manifest.append(f'<item id="c{chapter}" href="chapter{chapter}.xhtml" media-type="application/xhtml+xml"/>')
+            spine.append(f'<itemref idref="c{chapter}"/>')
+        archive.writestr("OEBPS/content.opf",
+                         '<?xml version="1.0"?><package xmlns="http://www.idpf.org/2007/opf" version="3.0">'
+                         f'<manifest>{"".join(manifest)}</manifest><spine>{"".join(spine)}</spine></package>')
+    return output.getvalue()
+
+
+# Function to build a CSV with numeric, categorical and time-series columns
+def make_csv(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.arange(rows)
+    frame = pd.DataFrame({
+        "step": x,
+        "value": np.sin(x / max(rows / 20, 1)) + rng.normal(0, 0.1, rows),
+        "group": rng.choice(["alpha", "beta", "gamma", "delta"], rows),
+        "score": rng.integers(0, 100, rows),
+    })
+    return frame.to_csv(index=False).encode("utf-8")
+
+
+# Function to build a CSV of short survey comments (for bulk sentiment analysis)
+def make_comments(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "student": np.arange(rows),
+        "comment": [" ".join(rng.choice(WORDS, rng.integers(5, 30))).capitalize() + "." for _ in range(rows)],
+    })
+    return frame.to_csv(index=False).encode("utf-8")
@@ -1,80 +1,111 @@
 import streamlit as st #for gui
-import PyPDF2 #for reading and extracting text from pdf files
-import ebooklib #handling EPUB files in the first script
-from ebooklib import epub
-import os #joins with the operating system
-import tempfile
-import re
-import requests
-
-# Function to extract text from PDF files
-def extract_text_from_pdf(file):
-    pdf_reader = PyPDF2.PdfReader(file)
-    num_pages = len(pdf_reader.pages)
-    text = ""
-    for page_num in range(num_pages):
-        page = pdf_reader.pages[page_num]
-        text += page.extract_text()
-    return text
-
-# Function to extract text from EPUB files
-def extract_text_from_epub(file_path):
-    book = epub.read_epub(file_path)
-    text = ""
-    for item in book.get_items_of_type(ebooklib.ITEM_DOCUMENT):
-        content = item.content.decode('utf-8', errors='ignore')
-        clean_text = re.sub('<[^<]+?>', '', content)  # Remove HTML tags
-        text += clean_text + "\n\n"
-    return text.strip()
+import time
+from student_helper import pdf_extraction #shared parallel pdf text extraction
+from student_helper import epub_extraction #streaming, in-memory epub text extraction
+from student_helper import webhook #background delivery of names to zapier
+from student_helper import metrics #extraction metrics (see the Metrics page)
+from student_helper import document_store #extracted text shared with the chatbot, keyed by upload hash
+from student_helper import batch_conversion #converting several files at once into a zip archive
+from student_helper.features.common import FILE_TYPES, load_document, upload_key
+
+# Function to read pages (PDF) or chapters (EPUB) from the document store, extracting and storing the file the first time
+def stored_pages(file, max_pages=None):
+    document = load_document(file)
+    if document is None:
+        return []
+    try:
+        return list(document.iter_pages(0, max_pages))
+    finally:
+        document.close()
+
+# Function to extract text from PDF files as a list of pages (optionally only the first few)
+def extract_text_from_pdf(file, max_pages=None):
+    # A preview of a new file only needs its first pages, not the whole document
+    if max_pages is not None and not document_store.get_store().has(upload_key(file)):
+        return pdf_extraction.extract_pages(file.getvalue(), 0, max_pages)
+    return stored_pages(file, max_pages)
+
+# Function to get the whole stored text of a file as bytes for download, with its number of pages (or chapters)
+def stored_text(file):
+    document = load_document(file)
+    if document is None:
+        return None, 0
+    try:
+        return document.data(), document.page_count
+    finally:
+        document.close()
 
 # Function to extract text from TXT files
 def extract_text_from_txt(file):
     text = file.read()
     return text
 
-# Function to save extracted text as a TXT file
-def save_text_as_txt(text, filename):
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write(text)
-
-# Function to delete temporary files
-def delete_temp_file(file_path):
-    os.remove(file_path)
-    
-    
-# Function to send name to Zapier
-@st.cache_data
+
+# Function to convert several files at once in the worker pool and offer them as one ZIP archive
+def convert_batch(uploaded_files):
+    st.write(f"{len(uploaded_files)} files uploaded successfully✅!")
+    if not st.button("Convert all and Download as ZIP🗜"):
+        return
+
+    files = [(upload_key(file), file.name, FILE_TYPES.get(file.type, file.type), file.getvalue()) for file in uploaded_files]
+    statuses = [st.empty() for _ in files]
+    for status, file in zip(statuses, uploaded_files):
+        status.write(f"⏳ {file.name}: converting...")
+    progress = st.progress(0.0, text="Converting...")
+
+    started = time.perf_counter()
+    converted = []
+    for done, (index, pages, seconds, error) in enumerate(batch_conversion.convert_files(files), start=1):
+        name = uploaded_files[index].name
+        if error is None:
+            unit = "chapters" if files[index][2] == "epub" else "pages"
+            statuses[index].write(f"✅ {name}: {pages} {unit} in {seconds:.1f}s")
+            converted.append(index)
+        else:
+            # A file that fails is reported and left out of the archive, the others are still converted
+            statuses[index].error(f"{name}: could not be converted ({error})")
+        progress.progress(done / len(files), text=f"Converted {done}/{len(files)} files")
+
+    if converted:
+        converted.sort()
+        names = batch_conversion.unique_names([f"{uploaded_files[i].name.split('.')[0]}.txt" for i in converted])
+        archive = batch_conversion.write_zip([(name, files[i][0]) for name, i in zip(names, converted)])
+        st.success(f"Converted {len(converted)} of {len(files)} files in {time.perf_counter() - started:.1f}s")
+        st.download_button(
+            label="Download ZIP🗜 archive🚀",
+            data=archive,
+            file_name="converted_texts.zip",
+            mime="application/zip"
+        )
+
+# Function to register the user's name with Zapier (delivered in the background)
 def send_name_to_zapier(name):
-    webhook_url = "https://hooks.zapier.com/hooks/catch/19454215/22bv1r6/"
-    payload = {"name": name}
-    try:
-        response = requests.post(webhook_url, json=payload)
-        response.raise_for_status()
-        return True
-    except requests.exceptions.RequestException as e:
-        st.error(f"Failed to send name to Zapier: {str(e)}")
-        return False
+    webhook.register_name(name)
 
 # Main function to run the Streamlit app
 def main():
     # Set up the Streamlit page
     st.set_page_config(page_title='Student Helper', page_icon="👨‍🎓")
+    metrics.start_exporter()
     st.title('👩‍🎓Student Helper👨‍🎓')
 
     # Create a sidebar for user input
     st.sidebar.title("Student aid")
     name = st.sidebar.text_input("Hey you! Help us to be of help to you.\nPlease, input your name:")
 
-    if name:
-        if send_name_to_zapier(name):
-            st.sidebar.write(f"Welcome, {name}! Thank you for choosing us as your go-to student helper.")
-        else:
-            st.sidebar.write(f"Welcome, {name}! We couldn't register your name, but we're still here to help.")
+    if name.strip():
+        send_name_to_zapier(name)
+        st.sidebar.write(f"Welcome, {name}! Thank you for choosing us as your go-to student helper.")
 
     # Main page content
     st.markdown('This app helps you to extract text from PDF, EPUB and TXT files')
     st.write("Upload a file📁:")
-    uploaded_file = st.file_uploader("Select a file📁 from your device💻", type=["pdf", "epub"])
+    uploaded_files = st.file_uploader("Select a file📁 from your device💻 (or several to convert them at once)",
+                                      type=["pdf", "epub"], accept_multiple_files=True)
+    if uploaded_files and len(uploaded_files) > 1:
+        convert_batch(uploaded_files)
+        return
+    uploaded_file = uploaded_files[0] if uploaded_files else None
 
     if uploaded_file:
         st.write("File uploaded successfully✅!")
@@ -83,45 +114,42 @@ def main():
         st.subheader("File Content:")
         if uploaded_file.type == "application/pdf":
             # Handle PDF files
-            text = extract_text_from_pdf(uploaded_file)
-            st.text(text[:500])  # Display first 500 characters to preview 
+            preview = "".join(extract_text_from_pdf(uploaded_file, pdf_extraction.PREVIEW_PAGES))
+            st.text(preview[:500])  # Display first 500 characters to preview 
 
             if st.button("Convert and Download as TXT🖹"):
+                started = time.perf_counter()
+                data, pages = stored_text(uploaded_file)
+                if data is None:
+                    return
+                seconds = time.perf_counter() - started
+                st.caption(f"Extracted {pages} pages in {seconds:.1f}s ({pages / max(seconds, 1e-9):.0f} pages/sec)")
                 filename = f"{uploaded_file.name.split('.')[0]}.txt"
-                save_text_as_txt(text, filename)
-                st.success(f"Text saved as {filename}")
+                st.success(f"Text converted to {filename}")
                 st.download_button(
                     label="Download TXT🖹 file🚀",
-                    data=open(filename, 'rb').read(),
+                    data=data,
                     file_name=filename,
                     mime="text/plain"
                 )
 
         elif uploaded_file.type == "application/epub+zip":
-            # Handle EPUB files
-            # Save the EPUB file temporarily
-            with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                temp_file.write(uploaded_file.read())  # Write contents of uploaded file
-                temp_file_path = temp_file.name
-
-            text = extract_text_from_epub(temp_file_path)
-            st.text(text[:500])  # Display first 500 characters
+            # Handle EPUB files (read from memory, only the first chapters are parsed for the preview)
+            st.text(epub_extraction.epub_preview(uploaded_file.getvalue(), 500))  # Display first 500 characters
 
             # Convert and download as TXT file
             if st.button("Convert and Download as TXT🖹"):
+                data, _ = stored_text(uploaded_file)
+                if data is None:
+                    return
                 filename = f"{uploaded_file.name.split('.')[0]}.txt"
-                save_text_as_txt(text, filename)
-                st.success(f"Text saved as {filename}")
-                with open(filename, 'rb') as file:
-                    st.download_button(
-                        label="Download TXT🖹 file🚀",
-                        data=file.read(),
-                        file_name=filename,
-                        mime="text/plain"
-                    )
-
-            # Delete the temporary EPUB file
-            delete_temp_file(temp_file_path)
+                st.success(f"Text converted to {filename}")
+                st.download_button(
+                    label="Download TXT🖹 file🚀",
+                    data=data,
+                    file_name=filename,
+                    mime="text/plain"
+                )
 
         else:
             st.error("Please upload a PDF or EPUB file.")
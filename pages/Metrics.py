@@ -0,0 +1,95 @@
+import streamlit as st #for gui
+import json
+import pandas as pd #for showing the metrics as tables
+from student_helper import metrics #in-process metrics registry
+from student_helper import response_cache #response cache hit/miss counters
+from student_helper import memory_governor #document and session memory use
+from student_helper import scheduler #rate limiter queue and wait metrics
+
+# Function to turn the histograms with a given name into a table
+def histogram_table(snapshot, name, scale=1.0):
+    rows = []
+    for histogram in snapshot["histograms"]:
+        if histogram["name"] == name:
+            row = dict(histogram["labels"])
+            row.update({"count": histogram["count"],
+                        "average": histogram["sum"] / histogram["count"] * scale if histogram["count"] else 0.0,
+                        "p50 (≤)": histogram["p50"] * scale, "p95 (≤)": histogram["p95"] * scale})
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+# Function to turn the counters with a given name into a table
+def counter_table(snapshot, name):
+    rows = [dict(counter["labels"], value=counter["value"]) for counter in snapshot["counters"] if counter["name"] == name]
+    return pd.DataFrame(rows)
+
+# Function to show a table, or a note if nothing was recorded yet
+def show_table(title, table):
+    st.subheader(title)
+    if table.empty:
+        st.write("Nothing recorded yet.")
+    else:
+        st.dataframe(table, hide_index=True)
+
+# Main function to run the Streamlit app
+def main():
+    st.set_page_config(page_title='Student Helper', page_icon="👨‍🎓")
+    st.title('📈Metrics')
+    st.markdown("Metrics for this app process since it started. They are also exported to "
+                "`.cache/metrics.prom` and `.cache/metrics.json`, and served at `/metrics` when `METRICS_PORT` is set.")
+    metrics.start_exporter()
+
+    snapshot = metrics.registry.snapshot()
+
+    # Cache hit rates per feature
+    cache_rows = {}
+    for counter in snapshot["counters"]:
+        if counter["name"] == "cache_requests_total":
+            row = cache_rows.setdefault(counter["labels"]["feature"], {"feature": counter["labels"]["feature"], "hit": 0, "miss": 0})
+            row[counter["labels"]["result"]] += counter["value"]
+    cache_table = pd.DataFrame(list(cache_rows.values()))
+    if not cache_table.empty:
+        cache_table["hit rate"] = cache_table["hit"] / (cache_table["hit"] + cache_table["miss"])
+
+    show_table("Model call latency (seconds)", histogram_table(snapshot, "model_call_seconds"))
+    show_table("Time to first token (seconds)", histogram_table(snapshot, "model_first_token_seconds"))
+    show_table("Prompt tokens (estimated)", histogram_table(snapshot, "prompt_tokens"))
+    show_table("Response tokens (estimated)", histogram_table(snapshot, "response_tokens"))
+    show_table("Response cache", cache_table)
+    show_table("Model errors", counter_table(snapshot, "model_call_errors_total"))
+    show_table("Quota retries", counter_table(snapshot, "model_retries_total"))
+    show_table("Requests joined to an identical one in flight", counter_table(snapshot, "coalesced_requests_total"))
+    show_table("Rate limiter wait (seconds)", histogram_table(snapshot, "scheduler_wait_seconds"))
+    show_table("Document reading (seconds)", histogram_table(snapshot, "read_file_seconds"))
+    show_table("Document store", counter_table(snapshot, "document_store_requests_total"))
+    show_table("PDF extraction (seconds)", histogram_table(snapshot, "pdf_extraction_seconds"))
+    show_table("EPUB chapter extraction (seconds)", histogram_table(snapshot, "epub_chapter_extraction_seconds"))
+
+    st.subheader("Memory")
+    memory = memory_governor.get_governor().snapshot()
+    st.write(f"Documents in memory: {memory['resident_documents']} "
+             f"({memory['resident_bytes'] / 1024 ** 2:.1f} of {memory['global_budget_bytes'] / 1024 ** 2:.0f} MB)")
+    show_table("Memory per session (MB)", pd.DataFrame([
+        {"session": session_id[:8], "documents": usage["documents"],
+         "in memory": round(usage["resident_bytes"] / 1024 ** 2, 2),
+         "memory-mapped": round(usage["mapped_bytes"] / 1024 ** 2, 2),
+         "session data": round(usage["state_bytes"] / 1024 ** 2, 2),
+         "total": round(usage["total_bytes"] / 1024 ** 2, 2)}
+        for session_id, usage in memory["sessions"].items()
+    ]))
+    show_table("Document text reads", counter_table(snapshot, "document_text_reads_total"))
+    show_table("Documents evicted from memory", counter_table(snapshot, "document_evictions_total"))
+
+    st.subheader("Rate limiter")
+    st.json(scheduler.get_scheduler().metrics())
+    st.subheader("Response cache counters")
+    st.json(response_cache.get_cache().stats())
+
+    st.download_button("Download Prometheus metrics", metrics.registry.to_prometheus(),
+                       file_name="metrics.prom", mime="text/plain")
+    st.download_button("Download JSON metrics", json.dumps(snapshot, indent=2),
+                       file_name="metrics.json", mime="application/json")
+
+# Run the app
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# Batch conversion of PDF/EPUB files to TXT: files are converted in the shared process pool (straight into the
+# document store, so the text never travels back through the pool) and then streamed into a ZIP archive
+import io
+import os
+import time
+import zipfile
+from concurrent.futures import as_completed
+
+from student_helper import document_store, metrics, pdf_extraction
+
+# Function to convert one file into the document store (runs inside the workers); returns (pages, bytes written, seconds).
+# Workers don't evict: the batch is accounted for (and protected) by the parent once it is finished.
+def convert_file(key, name, file_type, data, store_root, max_bytes):
+    started = time.perf_counter()
+    store = document_store.DocumentStore(store_root, max_bytes)
+    written = 0
+    document = store.open(key)
+    if document is None:
+        # Files are already converted in parallel, so each file is read in its worker
+        pages = document_store.iter_document_pages(data, file_type, parallel=False)
+        document = store.put(key, pages, evict=False, name=name, type=file_type)
+        if document is None:
+            raise LookupError(f"{name} was removed from the document store while it was being converted")
+        written = document.nbytes
+    try:
+        return document.page_count, written, time.perf_counter() - started
+    finally:
+        document.close()
+
+
+# Function to convert files given as (key, name, file type, bytes); yields (index, pages, seconds, error) as files finish
+def convert_files(files, store=None):
+    store = store or document_store.get_store()
+    futures = {
+        pdf_extraction.submit(convert_file, key, name, file_type, data, store.root, store.max_bytes): index
+        for index, (key, name, file_type, data) in enumerate(files)
+    }
+    written = 0
+    for future in as_completed(futures):
+        try:
+            pages, nbytes, seconds = future.result()
+        except Exception as e:
+            metrics.increment("batch_conversion_files_total", result="error")
+            yield futures[future], 0, 0.0, e
+        else:
+            written += nbytes
+            metrics.increment("batch_conversion_files_total", result="ok")
+            metrics.observe("batch_conversion_seconds", seconds)
+            yield futures[future], pages, seconds, None
+    # The batch is about to be zipped, so none of its documents may be evicted now
+    store.added(written, keep=[key for key, _, _, _ in files])
+
+
+# Function to get unique archive member names ("notes.txt", "notes (2).txt", ...)
+def unique_names(names):
+    used = set()
+    result = []
+    for name in names:
+        base, extension = os.path.splitext(name)
+        unique, count = name, 1
+        while unique in used:
+            count += 1
+            unique = f"{base} ({count}){extension}"
+        used.add(unique)
+        result.append(unique)
+    return result
+
+
+# Function to stream stored documents, given as (archive name, key), page by page into an in-memory ZIP archive
+# (only the compressed archive is held in memory, never the whole text)
+def write_zip(documents, store=None):
+    store = store or document_store.get_store()
+    archive_file = io.BytesIO()
+    with zipfile.ZipFile(archive_file, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, key in documents:
+            document = store.open(key)
+            if document is None:
+                continue
+            try:
+                with archive.open(name, "w") as member:
+                    for page in document.iter_pages():
+                        member.write(page.encode("utf-8"))
+            finally:
+                document.close()
+    archive_file.seek(0)
+    return archive_file
@@ -0,0 +1,123 @@
+# Bulk sentiment analysis: many items per request, several requests at a time, resumable after failures
+import io
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd #for reading csv datasets
+
+from student_helper import llm
+
+# Default settings (items per request, characters per request and per item, requests at a time, attempts per batch)
+DEFAULT_BATCH_SIZE = 25
+BATCH_CHARS = 8000
+MAX_ITEM_CHARS = 1000
+DEFAULT_MAX_WORKERS = 4
+MAX_ATTEMPTS = 3
+LABELS = ["positive", "negative", "neutral"]
+
+BATCH_PROMPT = """Analyze the sentiment of each numbered text below and categorize it as positive, negative, or neutral, with a brief explanation (one sentence) for the categorization.
+Reply with JSON only, no other text, with one result for every id, using exactly this format:
+{{"results": [{{"id": 1, "label": "positive", "explanation": "..."}}]}}
+{retry_note}
+Texts:
+{items}"""
+
+
+# Function to list the columns of an uploaded CSV file
+def csv_columns(data):
+    return list(pd.read_csv(io.BytesIO(data), nrows=0).columns)
+
+
+# Function to read the texts to analyze from a CSV column or a line-delimited text file
+def read_items(data, filename, column=None):
+    if filename.lower().endswith(".csv"):
+        frame = pd.read_csv(io.BytesIO(data), usecols=[column], dtype=str, keep_default_na=False)
+        items = frame[column].tolist()
+    else:
+        items = data.decode("utf-8", errors="replace").splitlines()
+    return [item.strip() for item in items if item.strip()]
+
+
+# Function to parse and validate a batch reply; raises ValueError unless every id has a valid label
+def parse_results(text, count):
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if not match:
+        raise ValueError("no JSON object in the reply")
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON: {e}") from e
+
+    results = {}
+    for item in data.get("results", []) if isinstance(data, dict) else []:
+        if not isinstance(item, dict):
+            continue
+        label = str(item.get("label", "")).strip().lower()
+        try:
+            item_id = int(item.get("id"))
+        except (TypeError, ValueError):
+            continue
+        if label in LABELS and 1 <= item_id <= count:
+            results[item_id] = (label, str(item.get("explanation", "")).strip())
+    missing = count - len(results)
+    if missing:
+        raise ValueError(f"{missing} of {count} items have no valid result")
+    return [results[i] for i in range(1, count + 1)]
+
+
+# Function to group texts into batches limited by item count and characters
+def make_batches(texts, batch_size=DEFAULT_BATCH_SIZE, batch_chars=BATCH_CHARS):
+    batch, size = [], 0
+    for text in texts:
+        length = min(len(text), MAX_ITEM_CHARS)
+        if batch and (len(batch) >= batch_size or size + length > batch_chars):
+            yield batch
+            batch, size = [], 0
+        batch.append(text)
+        size += length
+    if batch:
+        yield batch
+
+
+# Function to analyze one batch, retrying just this batch if the reply is unusable; returns {text: (label, explanation)}
+def analyze_batch(model, batch):
+    items = "\n".join(f"{i}. {' '.join(text[:MAX_ITEM_CHARS].split())}" for i, text in enumerate(batch, start=1))
+    last_error = None
+    for attempt in range(MAX_ATTEMPTS):
+        retry_note = "" if attempt == 0 else f"(Attempt {attempt + 1}: the previous reply was not valid JSON with a result for every id.)\n"
+        prompt = BATCH_PROMPT.format(retry_note=retry_note, items=items)
+        try:
+            reply = llm.generate_text(model, prompt, mode="sentiment_batch", validate=lambda text: parse_results(text, len(batch)))
+            return dict(zip(batch, parse_results(reply, len(batch))))
+        except ValueError as e:
+            last_error = e
+    raise ValueError(f"batch of {len(batch)} items failed after {MAX_ATTEMPTS} attempts: {last_error}")
+
+
+# Function to analyze every text not already in `results` (a {text: (label, explanation)} dict, updated in place
+# so a later call resumes where a failed one stopped). `progress` is called with (finished batches, total batches).
+# Returns the list of batch errors.
+def analyze_items(model, texts, results, batch_size=DEFAULT_BATCH_SIZE, max_workers=DEFAULT_MAX_WORKERS, progress=None):
+    pending = [text for text in dict.fromkeys(texts) if text not in results]
+    batches = list(make_batches(pending, batch_size))
+    errors = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="sentiment") as executor:
+        futures = [executor.submit(analyze_batch, model, batch) for batch in batches]
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                results.update(future.result())
+            except Exception as e:
+                errors.append(str(e))
+            if progress:
+                progress(done, len(batches))
+    return errors
+
+
+# Function to build the result table (one row per input text, in input order)
+def results_frame(texts, results):
+    return pd.DataFrame({
+        "text": texts,
+        "label": [results[text][0] if text in results else "" for text in texts],
+        "explanation": [results[text][1] if text in results else "" for text in texts],
+    })
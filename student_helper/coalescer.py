@@ -0,0 +1,117 @@
+# Single-flight coalescing: concurrent identical requests share one upstream call.
+# The first caller for a key (the leader) makes the call; everyone who asks for the same key while it is
+# in flight waits for the leader's result, or follows its stream chunk by chunk.
+import copy
+import threading
+
+from student_helper import metrics
+
+
+# Function to give each reader of a failed flight its own copy of the error (one exception object raised in
+# several threads would share, and overwrite, its traceback); the original is kept as the cause
+def _reader_error(error):
+    try:
+        copied = copy.copy(error)
+    except Exception:
+        copied = RuntimeError(f"coalesced request failed: {error!r}")
+    copied.__traceback__ = None
+    return copied
+
+
+class _Flight:
+    # Result of one in-flight call, published chunk by chunk to any number of readers
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._chunks = []
+        self._done = False
+        self._error = None
+
+    def publish(self, chunk):
+        with self._condition:
+            self._chunks.append(chunk)
+            self._condition.notify_all()
+
+    def finish(self, error=None):
+        with self._condition:
+            self._done = True
+            self._error = error
+            self._condition.notify_all()
+
+    # Function to iterate over every chunk, from the first one, as they are published
+    def __iter__(self):
+        index = 0
+        while True:
+            with self._condition:
+                while index >= len(self._chunks) and not self._done:
+                    self._condition.wait()
+                if index < len(self._chunks):
+                    chunk = self._chunks[index]
+                elif self._error is not None:
+                    raise _reader_error(self._error) from self._error
+                else:
+                    return
+            index += 1
+            yield chunk
+
+    # Function to wait for the complete result
+    def result(self):
+        return "".join(self)
+
+
+class Coalescer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    # Function to join the flight for a key, starting one if there is none; returns (flight, is leader)
+    def _join(self, key, feature):
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                metrics.increment("coalesced_requests_total", feature=feature)
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            return flight, True
+
+    # Function to end a flight; it is removed first so that later callers never join a failed call
+    def _land(self, key, flight, error=None):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.finish(error)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
+
+    # Function to get the text for a key, calling `call()` only if no identical call is in flight
+    def run(self, key, call, feature="default"):
+        flight, leader = self._join(key, feature)
+        if not leader:
+            return flight.result()
+        try:
+            text = call()
+        except BaseException as e:
+            self._land(key, flight, e)
+            raise
+        flight.publish(text)
+        self._land(key, flight)
+        return text
+
+    # Function to stream the chunks for a key, starting `produce()` (a chunk generator) only if no identical
+    # call is in flight. The leader's stream runs in its own thread, so followers keep receiving chunks
+    # even if the session that started it goes away.
+    def stream(self, key, produce, feature="default"):
+        flight, leader = self._join(key, feature)
+        if leader:
+            def pump():
+                try:
+                    for chunk in produce():
+                        flight.publish(chunk)
+                except BaseException as e:
+                    self._land(key, flight, e)
+                else:
+                    self._land(key, flight)
+
+            threading.Thread(target=pump, name="stream-pump", daemon=True).start()
+        return iter(flight)
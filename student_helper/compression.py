@@ -0,0 +1,85 @@
+# Extractive pre-compression: pick representative sentences from the whole document to fit a token budget
+import re
+
+import numpy as np
+
+from student_helper.retrieval import tokenize
+from student_helper.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+# Default budget for document content in quiz prompts (tokens)
+DEFAULT_TOKEN_BUDGET = 6000
+# The document is split into this many consecutive sections, each getting an equal share of the budget
+DEFAULT_SECTIONS = 12
+
+SENTENCE_PATTERN = re.compile(r"[^.!?\n]+(?:[.!?]+|\n|$)")
+
+
+# Function to split text into sentences (lines without punctuation, e.g. headings, count as sentences)
+def split_sentences(text):
+    return [s.strip() for s in SENTENCE_PATTERN.findall(text) if len(s.strip()) > 1]
+
+
+# Function to cut a sentence longer than `max_chars` into pieces at word boundaries where possible
+def split_long_sentence(sentence, max_chars):
+    pieces = []
+    while len(sentence) > max_chars:
+        cut = sentence.rfind(" ", 0, max_chars + 1)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(sentence[:cut].strip())
+        sentence = sentence[cut:].strip()
+    if sentence:
+        pieces.append(sentence)
+    return pieces
+
+
+# Function to score sentences by cosine similarity to the document centroid (TF-IDF, computed sparsely)
+def centroid_scores(sentences):
+    vocabulary = {}
+    rows, columns = [], []
+    for row, sentence in enumerate(sentences):
+        for token in tokenize(sentence):
+            rows.append(row)
+            columns.append(vocabulary.setdefault(token, len(vocabulary)))
+    if not vocabulary:
+        return np.zeros(len(sentences))
+
+    rows, columns = np.asarray(rows), np.asarray(columns)
+    # Collapse repeated (sentence, term) pairs into term frequencies
+    pairs, counts = np.unique(rows * len(vocabulary) + columns, return_counts=True)
+    rows, columns = pairs // len(vocabulary), pairs % len(vocabulary)
+
+    document_frequency = np.bincount(columns, minlength=len(vocabulary))
+    weights = counts * np.log(1 + len(sentences) / document_frequency[columns])
+    norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=len(sentences)))
+    weights = weights / norms[rows]
+
+    centroid = np.bincount(columns, weights=weights, minlength=len(vocabulary)) / len(sentences)
+    return np.bincount(rows, weights=weights * centroid[columns], minlength=len(sentences))
+
+
+# Function to shrink text to at most `max_tokens`, keeping the most central sentences of every section
+def fit_to_budget(text, max_tokens=DEFAULT_TOKEN_BUDGET, sections=DEFAULT_SECTIONS):
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # Long unpunctuated text would be one sentence bigger than any section's share, so it is cut into pieces
+    max_chars = max(1, int(max_tokens / max(1, sections)) - 1) * CHARS_PER_TOKEN
+    sentences = [piece for sentence in split_sentences(text) for piece in split_long_sentence(sentence, max_chars)]
+    if not sentences:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+
+    scores = centroid_scores(sentences)
+    sizes = np.array([estimate_tokens(sentence) + 1 for sentence in sentences])
+    sections = max(1, min(sections, len(sentences)))
+    section_budget = max_tokens / sections
+
+    selected = []
+    for section in np.array_split(np.arange(len(sentences)), sections):
+        used = 0
+        for index in section[np.argsort(-scores[section], kind="stable")]:
+            if used + sizes[index] <= section_budget:
+                selected.append(index)
+                used += sizes[index]
+    if not selected:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    return " ".join(sentences[i] for i in sorted(selected))
@@ -0,0 +1,94 @@
+# Multi-turn conversations with bounded memory: recent turns are kept verbatim within a token budget
+# and older turns are folded into a rolling summary (in the background, while the user reads the reply)
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from student_helper import llm
+from student_helper.tokens import estimate_tokens
+
+# Tokens of verbatim history sent with each message; once exceeded, the oldest turns are summarized
+# until the recent turns fit in half of it
+HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKENS", 2000))
+SUMMARY_WORDS = 150
+# Characters kept per stored message and messages kept for display in one session
+MAX_MESSAGE_CHARS = 8000
+MAX_DISPLAY_MESSAGES = 100
+
+PREAMBLE = "The following is a conversation between a student and Johnify, a helpful general-purpose assistant."
+SUMMARY_PROMPT = """Update the summary of a conversation between a student (User) and an assistant with the new turns below.
+Keep the facts, names, decisions and open questions needed to continue the conversation, in at most {words} words.
+Reply with the updated summary only.
+
+Current summary:
+{summary}
+
+New turns:
+{turns}"""
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chat-summary")
+
+
+# Function to format turns as "User: ..." / "Assistant: ..." lines
+def format_turns(turns):
+    return "\n".join(f"{'User' if role == 'user' else 'Assistant'}: {text}" for role, text in turns)
+
+
+# Function to fold turns into the running summary
+def summarize(model, summary, turns):
+    prompt = SUMMARY_PROMPT.format(words=SUMMARY_WORDS, summary=summary or "(none)", turns=format_turns(turns))
+    return llm.generate_text(model, prompt, mode="chat_summary").strip()
+
+
+class Conversation:
+    # One chat session (kept in st.session_state)
+    def __init__(self, token_budget=HISTORY_TOKEN_BUDGET):
+        self.token_budget = token_budget
+        self.summary = ""
+        self.turns = []  # recent (role, text) turns sent verbatim
+        self.messages = []  # (role, text) messages shown in the chat window
+        self.folded = 0  # messages no longer shown
+        self._pending = None  # (future, turns being summarized)
+
+    # Function to wait for a background summary and apply it
+    def settle(self):
+        if self._pending is not None:
+            future, turns = self._pending
+            self._pending = None
+            try:
+                self.summary = future.result()
+            except Exception:
+                # Keep the turns verbatim rather than losing them; they are summarized again next time
+                self.turns[:0] = turns
+
+    # Function to build the prompt for the next user message (the first message is sent on its own)
+    def prompt_for(self, user_input):
+        self.settle()
+        if not self.summary and not self.turns:
+            return f"User: {user_input}\nAssistant: "
+        parts = [PREAMBLE]
+        if self.summary:
+            parts.append(f"Summary of the earlier conversation:\n{self.summary}")
+        parts.append(format_turns(self.turns + [("user", user_input)]) + "\nAssistant: ")
+        return "\n\n".join(parts)
+
+    # Function to record a finished exchange and start summarizing old turns if the history is over budget
+    def add_exchange(self, model, user_input, reply):
+        for role, text in (("user", user_input), ("assistant", reply)):
+            self.turns.append((role, text[:MAX_MESSAGE_CHARS]))
+            self.messages.append((role, text[:MAX_MESSAGE_CHARS]))
+        if len(self.messages) > MAX_DISPLAY_MESSAGES:
+            self.folded += len(self.messages) - MAX_DISPLAY_MESSAGES
+            del self.messages[:-MAX_DISPLAY_MESSAGES]
+
+        if self.history_tokens() <= self.token_budget:
+            return
+        self.settle()
+        old = []
+        # Always keep the last exchange verbatim
+        while len(self.turns) > 2 and self.history_tokens() > self.token_budget // 2:
+            old.append(self.turns.pop(0))
+        if old:
+            self._pending = (_executor.submit(summarize, model, self.summary, old), old)
+
+    def history_tokens(self):
+        return estimate_tokens(self.summary) + sum(estimate_tokens(text) for _, text in self.turns)
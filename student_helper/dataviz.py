@@ -0,0 +1,129 @@
+# Helpers for charting large CSV files: column-pruned reads, downsampling and server-side aggregation
+import io
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+# Points drawn for line/scatter charts and bars drawn for bar charts
+MAX_POINTS = 2000
+MAX_BARS = 50
+PREVIEW_ROWS = 5
+
+try:
+    import pyarrow  # noqa: F401 (only used through pandas)
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+
+# Function to read the column names and first rows of a CSV
+def read_csv_preview(data, rows=PREVIEW_ROWS):
+    return pd.read_csv(io.BytesIO(data), nrows=rows)
+
+
+# Function to shrink dtypes: downcast numbers and store repetitive text as categories
+def optimize_dtypes(frame):
+    for column in frame.columns:
+        series = frame[column]
+        if pd.api.types.is_integer_dtype(series):
+            frame[column] = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_float_dtype(series):
+            frame[column] = pd.to_numeric(series, downcast="float")
+        elif series.dtype == object and series.nunique(dropna=False) <= max(1, len(series) // 2):
+            frame[column] = series.astype("category")
+    return frame
+
+
+# Function to read only the given columns of a CSV
+def read_csv_columns(data, columns):
+    frame = pd.read_csv(io.BytesIO(data), usecols=list(columns), engine=CSV_ENGINE)
+    return optimize_dtypes(frame)
+
+
+# Function to get a numeric version of a column for sampling (row positions if it isn't numeric or dates)
+def _numeric_values(series):
+    if pd.api.types.is_numeric_dtype(series):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.astype("int64").to_numpy(dtype=np.float64)
+    return np.arange(len(series), dtype=np.float64)
+
+
+# Function to pick the row indices kept by Largest-Triangle-Three-Buckets downsampling
+def lttb_indices(x, y, threshold=MAX_POINTS):
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        # Average of the next bucket is the third corner of the triangle
+        next_start, next_end = end, max(edges[i + 2] if i + 2 < len(edges) else n, end + 1)
+        average_x = x[next_start:next_end].mean()
+        average_y = y[next_start:next_end].mean()
+        areas = np.abs((x[previous] - average_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (average_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+    return selected
+
+
+# Function to keep one point per occupied grid cell, preserving the shape (and outliers) of a scatter plot
+def grid_sample_indices(x, y, max_points=MAX_POINTS):
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+    bins = int(np.sqrt(max_points))
+
+    def cells(values):
+        low, high = values.min(), values.max()
+        if high == low:
+            return np.zeros(len(values), dtype=np.int64)
+        return np.minimum(((values - low) / (high - low) * bins).astype(np.int64), bins - 1)
+
+    cell = cells(x) * bins + cells(y)
+    _, first = np.unique(cell, return_index=True)
+    return np.sort(first)
+
+
+# Function to aggregate bars on the server: mean of y per x, binned or limited to the most frequent values
+def aggregate_bars(frame, x_column, y_column, max_bars=MAX_BARS):
+    x = frame[x_column]
+    if x.nunique() > max_bars:
+        if pd.api.types.is_numeric_dtype(x):
+            x = pd.cut(x, max_bars)
+        else:
+            top = x.value_counts().index[:max_bars]
+            frame = frame[x.isin(top)]
+            x = frame[x_column]
+    return frame.groupby(x, observed=True)[y_column].mean()
+
+
+# Function to render a chart to PNG bytes (the figure isn't kept around after rendering)
+def render_chart(frame, x_column, y_column, chart_type):
+    fig = Figure()
+    ax = fig.subplots()
+    if chart_type == "Bar":
+        aggregate_bars(frame, x_column, y_column).plot(kind="bar", ax=ax)
+        ax.set_ylabel(f"mean of {y_column}")
+    else:
+        frame = frame.dropna(subset=[x_column, y_column])
+        if chart_type == "Line":
+            frame = frame.sort_values(x_column) if pd.api.types.is_numeric_dtype(frame[x_column]) else frame
+            keep = lttb_indices(_numeric_values(frame[x_column]), _numeric_values(frame[y_column]))
+            frame.iloc[keep].plot(kind="line", x=x_column, y=y_column, ax=ax)
+        else:
+            keep = grid_sample_indices(_numeric_values(frame[x_column]), _numeric_values(frame[y_column]))
+            frame.iloc[keep].plot(kind="scatter", x=x_column, y=y_column, ax=ax)
+        ax.set_ylabel(y_column)
+    ax.set_title(f"{chart_type} Chart: {y_column} vs {x_column}")
+    ax.set_xlabel(x_column)
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    return buffer.getvalue()
@@ -0,0 +1,320 @@
+# Persistent store of extracted document text, keyed by the SHA-256 of the uploaded file.
+# Each document is a directory holding the text (read through a memory map), page offsets, metadata and
+# derived artifacts (indexes, compressed versions, ...). Several replicas can share it on one volume.
+import hashlib
+import json
+import logging
+import mmap
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from student_helper import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "documents")
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+# Seconds between full scans of the store (picking up documents written by other processes)
+RESCAN_INTERVAL = 300
+# Version of the artifact layouts; artifacts written with another version are ignored and rebuilt
+ARTIFACT_VERSION = 2
+
+
+# Function to compute the store key of an uploaded file
+def content_key(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class DocumentText(str):
+    # Text of a stored document that remembers its store key
+    def __new__(cls, text, key):
+        value = super().__new__(cls, text)
+        value.key = key
+        return value
+
+    # Pickled (e.g. by st.cache_data) together with its key
+    def __reduce__(self):
+        return (DocumentText, (str(self), self.key))
+
+
+# Function to get the key of a document's text: its store key if it came from the store, else a hash of the text
+def text_key(text):
+    return getattr(text, "key", None) or hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# Function to extract the pages of an uploaded file in the form they are stored: PDF pages separated by a
+# newline, EPUB chapters (which carry their own spacing) and TXT files as they are
+def iter_document_pages(data, file_type, parallel=True):
+    if file_type == "pdf":
+        from student_helper import pdf_extraction #parallel, page-by-page pdf text extraction
+
+        for number, page in enumerate(pdf_extraction.iter_pages(data, parallel=parallel)):
+            yield page if number == 0 else "\n" + page
+    elif file_type == "epub":
+        from student_helper import epub_extraction #streaming, in-memory epub text extraction
+
+        yield from epub_extraction.iter_epub_text(data)
+    elif file_type == "txt":
+        yield data.decode("utf-8")
+    else:
+        raise ValueError(f"unsupported file type: {file_type}")
+
+
+class StoredDocument:
+    # Read-only view of a stored document; the text is memory-mapped, pages are decoded on demand
+    def __init__(self, path, key):
+        self.path = path
+        self.key = key
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.offsets = self.meta["offsets"]
+        self._file = open(os.path.join(path, "text.txt"), "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    @property
+    def page_count(self):
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self):
+        return self.offsets[-1]
+
+    # Function to decode the text between two byte offsets
+    def read(self, start, end):
+        return self._map[start:end].decode("utf-8")
+
+    def page(self, index):
+        return self.read(self.offsets[index], self.offsets[index + 1])
+
+    def iter_pages(self, start=0, end=None):
+        for index in range(start, self.page_count if end is None else min(end, self.page_count)):
+            yield self.page(index)
+
+    # Function to get the whole text (pages joined with `separator`)
+    def text(self, separator=""):
+        if separator:
+            return separator.join(self.iter_pages())
+        return self._map[:self.nbytes].decode("utf-8")
+
+    # Function to get the whole text as UTF-8 bytes, in one read of the file
+    def data(self):
+        return bytes(self._map[:self.nbytes])
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+
+class StoredPassages:
+    # Passages of a stored document kept as byte ranges of its text file instead of strings;
+    # used by the indexes and summary chunks of large documents so they don't hold the document in memory
+    def __init__(self, key, text, passages):
+        self.key = key
+        self.spans = []
+        char_position = byte_position = 0
+        for passage in passages:
+            start = text.find(passage, char_position)
+            byte_position += len(text[char_position:start].encode("utf-8"))
+            length = len(passage.encode("utf-8"))
+            self.spans.append((byte_position, byte_position + length))
+            char_position, byte_position = start + len(passage), byte_position + length
+        self._document = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.spans)
+
+    def __getitem__(self, index):
+        start, end = self.spans[index]
+        with self._lock:
+            if self._document is None:
+                self._document = get_store().open(self.key)
+                if self._document is None:
+                    raise LookupError("the document is no longer in the document store")
+        return self._document.read(start, end)
+
+    # Function to recreate passages from byte spans saved earlier
+    @classmethod
+    def from_spans(cls, key, spans):
+        passages = cls.__new__(cls)
+        passages.key = key
+        passages.spans = [(int(start), int(end)) for start, end in spans]
+        passages._document = None
+        passages._lock = threading.Lock()
+        return passages
+
+    def close(self):
+        with self._lock:
+            if self._document is not None:
+                self._document.close()
+                self._document = None
+
+
+class DocumentStore:
+    def __init__(self, root=DEFAULT_STORE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Estimated size of the store, kept up to date between scans (None until the first scan)
+        self._total = None
+        self._scanned = 0.0
+        os.makedirs(os.path.join(root, "tmp"), exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def has(self, key):
+        return os.path.exists(os.path.join(self._path(key), "meta.json"))
+
+    # Function to open a stored document (None if it isn't stored); opening marks it as recently used
+    def open(self, key):
+        path = self._path(key)
+        try:
+            document = StoredDocument(path, key)
+        except (OSError, ValueError, KeyError):
+            metrics.increment("document_store_requests_total", result="miss")
+            return None
+        metrics.increment("document_store_requests_total", result="hit")
+        try:
+            os.utime(os.path.join(path, "meta.json"))
+        except OSError:
+            pass
+        return document
+
+    # Function to store a document from its pages (any iterable of strings); returns the stored document.
+    # The new document is never evicted by its own write, even if it is bigger than max_bytes.
+    def put(self, key, pages, evict=True, **meta):
+        staging = os.path.join(self.root, "tmp", f"{key}.{uuid.uuid4().hex}")
+        os.makedirs(os.path.join(staging, "artifacts"))
+        try:
+            offsets = [0]
+            with open(os.path.join(staging, "text.txt"), "wb") as f:
+                for page in pages:
+                    data = page.encode("utf-8")
+                    f.write(data)
+                    offsets.append(offsets[-1] + len(data))
+            meta.update(offsets=offsets, created=time.time())
+            with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            size = offsets[-1] + os.path.getsize(os.path.join(staging, "meta.json"))
+            os.makedirs(os.path.dirname(self._path(key)), exist_ok=True)
+            try:
+                os.rename(staging, self._path(key))
+            except OSError:
+                # Stored by another session or replica in the meantime
+                shutil.rmtree(staging, ignore_errors=True)
+                size = 0
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        metrics.increment("document_store_writes_total")
+        if evict:
+            self.added(size, keep=[key])
+        return self.open(key)
+
+    def _artifact_path(self, key, name, extension):
+        return os.path.join(self._path(key), "artifacts", f"{name}.v{ARTIFACT_VERSION}.{extension}")
+
+    # Function to load a derived artifact of a document (None if missing or unreadable).
+    # Artifacts are JSON values, or dicts of numpy arrays saved as .npz; nothing is unpickled.
+    def get_artifact(self, key, name):
+        try:
+            path = self._artifact_path(key, name, "npz")
+            if os.path.exists(path):
+                with np.load(path, allow_pickle=False) as arrays:
+                    return {field: arrays[field] for field in arrays.files}
+            with open(self._artifact_path(key, name, "json"), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # A damaged or incompatible artifact is rebuilt like a missing one
+            logger.warning("ignoring unreadable artifact %s of document %s: %s", name, key, e)
+            return None
+
+    # Function to save a derived artifact of a stored document (a JSON value, or a dict of numpy arrays)
+    def put_artifact(self, key, name, value):
+        directory = os.path.join(self._path(key), "artifacts")
+        if not os.path.isdir(directory):
+            return
+        temporary = os.path.join(directory, f".{name}.{uuid.uuid4().hex}")
+        if isinstance(value, dict) and value and all(isinstance(item, np.ndarray) for item in value.values()):
+            with open(temporary, "wb") as f:
+                np.savez_compressed(f, **value)
+            path = self._artifact_path(key, name, "npz")
+        else:
+            with open(temporary, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            path = self._artifact_path(key, name, "json")
+        size = os.path.getsize(temporary)
+        os.replace(temporary, path)
+        self.added(size, keep=[key])
+
+    # Function to account for bytes added to the store (here or by a worker process), and evict
+    # documents when the store may be over max_bytes or a rescan is due
+    def added(self, nbytes, keep=()):
+        with self._lock:
+            if self._total is not None:
+                self._total += nbytes
+            due = (self._total is None or self._total > self.max_bytes
+                   or time.monotonic() - self._scanned > RESCAN_INTERVAL)
+        if due:
+            self.evict(keep)
+
+    # Function to remove the least recently used documents (except the `keep` keys) until the store is within max_bytes
+    def evict(self, keep=()):
+        keep = {self._path(key) for key in keep}
+        with self._lock:
+            documents = []
+            for prefix in os.listdir(self.root):
+                if prefix == "tmp" or not os.path.isdir(os.path.join(self.root, prefix)):
+                    continue
+                for key in os.listdir(os.path.join(self.root, prefix)):
+                    path = os.path.join(self.root, prefix, key)
+                    try:
+                        last_used = os.path.getmtime(os.path.join(path, "meta.json"))
+                        size = sum(entry.stat().st_size for directory in (path, os.path.join(path, "artifacts"))
+                                   for entry in os.scandir(directory) if entry.is_file())
+                    except OSError:
+                        continue
+                    documents.append((last_used, size, path))
+            total = sum(size for _, size, _ in documents)
+            for _, size, path in sorted(documents):
+                if total <= self.max_bytes:
+                    break
+                if path in keep:
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                metrics.increment("document_store_evictions_total")
+            self._total = total
+            self._scanned = time.monotonic()
+            return total
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+# Function to get the process-wide document store
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DocumentStore(os.getenv("DOCUMENT_STORE_PATH", DEFAULT_STORE_PATH),
+                                   int(os.getenv("DOCUMENT_STORE_MAX_BYTES", DEFAULT_MAX_BYTES)))
+        return _store
+
+
+# Function to replace the process-wide document store
+def set_store(store):
+    global _store
+    with _store_lock:
+        _store = store
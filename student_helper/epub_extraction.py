@@ -0,0 +1,118 @@
+# Streaming EPUB text extraction: reads the book from memory and converts one chapter at a time
+import codecs
+import io
+import posixpath
+import re
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from html.parser import HTMLParser
+from urllib.parse import unquote
+
+from student_helper import metrics
+
+# Bytes of chapter markup fed to the parser at a time
+FEED_SIZE = 64 * 1024
+
+CONTAINER_NS = {"c": "urn:oasis:names:tc:opendocument:xmlns:container"}
+OPF_NS = {"opf": "http://www.idpf.org/2007/opf"}
+DOCUMENT_TYPES = {"application/xhtml+xml", "text/html"}
+
+BLOCK_TAGS = {
+    "p", "div", "br", "hr", "li", "ul", "ol", "tr", "table", "section", "article", "aside",
+    "blockquote", "pre", "h1", "h2", "h3", "h4", "h5", "h6", "dt", "dd", "figcaption",
+}
+SKIP_TAGS = {"head", "script", "style"}
+
+BLANK_LINES = re.compile(r"\n[ \t\r]*(?:\n[ \t\r]*)+")
+
+
+class _TextExtractor(HTMLParser):
+    # Incremental HTML-to-text parser: block tags become line breaks, head/script/style are dropped
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._skip_depth = 0
+        self._parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._parts.append(data)
+
+    def text(self):
+        return "".join(self._parts)
+
+
+# Function to find the chapter files of an EPUB in reading (spine) order
+def chapter_paths(archive):
+    container = ET.fromstring(archive.read("META-INF/container.xml"))
+    rootfile = container.find(".//c:rootfile", CONTAINER_NS).get("full-path")
+    package = ET.fromstring(archive.read(rootfile))
+    base = posixpath.dirname(rootfile)
+
+    manifest = {}
+    for item in package.iterfind("opf:manifest/opf:item", OPF_NS):
+        if item.get("media-type") in DOCUMENT_TYPES:
+            manifest[item.get("id")] = posixpath.normpath(posixpath.join(base, unquote(item.get("href"))))
+
+    spine = [item.get("idref") for item in package.iterfind("opf:spine/opf:itemref", OPF_NS)]
+    ordered = [manifest[idref] for idref in spine if idref in manifest]
+    return ordered or list(manifest.values())
+
+
+# Function to convert one chapter to text, feeding the parser in slices
+def _chapter_text(archive, path):
+    parser = _TextExtractor()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    with archive.open(path) as chapter:
+        while True:
+            data = chapter.read(FEED_SIZE)
+            parser.feed(decoder.decode(data, final=not data))
+            if not data:
+                break
+    parser.close()
+    return BLANK_LINES.sub("\n\n", parser.text()).strip()
+
+
+# Function to yield the text of an EPUB (given as bytes) chapter by chapter
+def iter_epub_text(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        names = set(archive.namelist())
+        first = True
+        for path in chapter_paths(archive):
+            if path not in names:
+                continue
+            started = time.perf_counter()
+            text = _chapter_text(archive, path)
+            metrics.observe("epub_chapter_extraction_seconds", time.perf_counter() - started)
+            metrics.increment("epub_chapters_extracted_total")
+            if not text:
+                continue
+            yield text if first else "\n\n" + text
+            first = False
+
+
+# Function to get the first characters of an EPUB without converting the whole book
+def epub_preview(data, length=500):
+    preview = ""
+    for text in iter_epub_text(data):
+        preview += text
+        if len(preview) >= length:
+            break
+    return preview[:length]
+
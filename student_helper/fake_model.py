@@ -0,0 +1,43 @@
+# Deterministic stand-in for genai.GenerativeModel, for running the app and benchmarks offline
+import threading
+import time
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+# Function to build the default fake answer for a prompt
+def default_responder(prompt):
+    words = prompt.split()
+    return f"Fake response to a {len(prompt)}-character prompt ({len(words)} words): " + " ".join(words[:40])
+
+
+class FakeGenerativeModel:
+    # latency: seconds before the first token; chunk_delay: seconds between streamed chunks
+    def __init__(self, model_name="fake-gemini", latency=0.0, chunk_delay=0.0, chunk_words=5, responder=default_responder):
+        self.model_name = model_name
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.chunk_words = chunk_words
+        self.responder = responder
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        with self._lock:
+            self.prompts.append(prompt)
+        text = self.responder(prompt)
+        time.sleep(self.latency)
+        if stream:
+            return self._stream(text)
+        return FakeResponse(text)
+
+    def _stream(self, text):
+        words = text.split(" ")
+        for i in range(0, len(words), self.chunk_words):
+            if i:
+                time.sleep(self.chunk_delay)
+            piece = " ".join(words[i:i + self.chunk_words])
+            yield FakeResponse(piece if i == 0 else " " + piece)
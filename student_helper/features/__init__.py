@@ -0,0 +1,11 @@
+# Feature pages of the main app, imported only when the feature is selected in the sidebar
+FEATURE_MODULES = {
+    "Document Q&A": "student_helper.features.document_qa",
+    "Summarization": "student_helper.features.summarization",
+    "Quiz Generation": "student_helper.features.quiz_generation",
+    "Sentiment Analysis": "student_helper.features.sentiment",
+    "Data Visualization": "student_helper.features.data_visualization",
+    "Translator": "student_helper.features.translator",
+    "Interactive Quiz": "student_helper.features.interactive_quiz",
+    "General Chatbot": "student_helper.features.general_chatbot",
+}
@@ -0,0 +1,212 @@
+# Shared pieces of the feature pages: the model client, file reading and downloads.
+# Heavy modules (the Gemini SDK, PyPDF2, the model call stack) are imported only when first needed.
+import io #deals with input and output
+import logging #reports problems that shouldn't break the page
+import os #joins with the operating system
+import threading #one session builds a document artifact while the others wait
+from contextlib import contextmanager #document text that is only held for a block
+import streamlit as st #for gui
+from student_helper import metrics #latency, token, cache and error metrics (see the Metrics page)
+from student_helper import document_store #persistent store of extracted document text, keyed by upload hash
+from student_helper import memory_governor #document references, spill-to-disk and memory budgets
+
+logger = logging.getLogger(__name__)
+
+# Locks for building document artifacts, picked by a hash of the document key and artifact name
+ARTIFACT_LOCKS = [threading.Lock() for _ in range(64)]
+
+# List of subjects for quiz generation
+SUBJECTS = [
+    "Mathematics", "Physics", "Chemistry", "Biology", "History", "Geography",
+    "Literature", "Computer Science", "Psychology", "Economics", "Political Science",
+    "Art History", "Music Theory", "Environmental Science", "Astronomy", "Philosophy",
+    "Sociology", "Anthropology", "Linguistics", "World Religions", "Physical Education",
+    "Nutrition", "Business Studies", "Law", "Engineering", "Medicine", "Foreign Languages"
+]
+
+# Document types by the MIME type of the upload
+FILE_TYPES = {"application/pdf": "pdf", "application/epub+zip": "epub", "text/plain": "txt"}
+
+# Token budget for document content in quiz prompts
+QUIZ_TOKEN_BUDGET = int(os.getenv("QUIZ_TOKEN_BUDGET", 6000))  # same default as compression.DEFAULT_TOKEN_BUDGET
+
+# Function to create the Gemini Pro model once per process (shared by every session and rerun)
+@st.cache_resource
+def get_model():
+    import google.generativeai as genai #interact with generative models
+
+    # Configure Google AI API
+    genai.configure(api_key=os.getenv("GOOGLE_API_KEY_1"))
+    return genai.GenerativeModel('gemini-pro')
+
+# Function to get the content hash of an upload, computed once per uploaded file instead of on every rerun
+def upload_key(uploaded_file):
+    keys = st.session_state.setdefault("upload_keys", {})
+    if uploaded_file.file_id not in keys:
+        keys[uploaded_file.file_id] = document_store.content_key(uploaded_file.getvalue())
+    return keys[uploaded_file.file_id]
+
+# Function to get the id of the current session (None outside of a Streamlit session)
+def session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx #the session running this script
+
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+# Function to get the stored text of an uploaded document, extracting and storing it the first time it is seen
+# (None, with an error shown, if it couldn't be stored)
+def load_document(uploaded_file):
+    key = upload_key(uploaded_file)
+    store = document_store.get_store()
+    document = store.open(key)
+    if document is None:
+        file_type = FILE_TYPES.get(uploaded_file.type, "txt")
+        with metrics.timed("read_file", type=file_type):
+            pages = document_store.iter_document_pages(uploaded_file.getvalue(), file_type)
+            document = store.put(key, pages, name=uploaded_file.name, type=file_type)
+    if document is None:
+        st.error(f"Could not keep {uploaded_file.name} in the document store. Please upload it again.")
+    return document
+
+# Function to read content from uploaded files; returns a reference to the stored text (see memory_governor)
+def read_file_content(uploaded_file):
+    # Handle different file types
+    if uploaded_file.type in ("text/plain", "application/pdf"):
+        document = load_document(uploaded_file)
+        if document is None:
+            return None
+        try:
+            return memory_governor.DocumentRef(document.key, uploaded_file.name, document.meta["type"],
+                                               document.nbytes, session_id())
+        finally:
+            document.close()
+    else:
+        st.error("Unsupported file type. Please upload a .txt or .pdf file.")
+        return None
+
+# Function to get the text of document content (a reference to an uploaded document, or plain text)
+def as_text(content):
+    return content.text() if isinstance(content, memory_governor.DocumentRef) else content
+
+# Function to get the text of document content for the duration of a `with` block
+# (a large document counts against the memory budget only while the block runs)
+@contextmanager
+def reading_text(content):
+    if isinstance(content, memory_governor.DocumentRef):
+        with content.reading() as text:
+            yield text
+    else:
+        yield content
+
+# Function to save passages of a stored document (exact substrings of its text) as an array of byte spans
+def passage_spans(file_content, text, passages):
+    import numpy as np #arrays of saved passage positions
+
+    spans = document_store.StoredPassages(file_content.key, text, passages).spans
+    return np.array(spans, dtype=np.int64).reshape(-1, 2)
+
+# Function to get passages back from their byte spans: read into memory for small documents,
+# read from the memory-mapped file one at a time for large ones
+def passages_from_spans(file_content, spans):
+    passages = document_store.StoredPassages.from_spans(file_content.key, spans)
+    if file_content.spilled:
+        return passages
+    try:
+        return list(passages)
+    finally:
+        passages.close()
+
+# Function to return this session's memory use (documents and session state). Measuring walks the
+# whole session state, so it is only done every few seconds; a failure never breaks the page.
+def track_session_memory():
+    try:
+        sid = session_id()
+        if sid is None:
+            return None
+        governor = memory_governor.get_governor()
+        if governor.report_due(sid):
+            governor.report_session(sid, memory_governor.approximate_size(dict(st.session_state)))
+        return governor.session_usage(sid)
+    except Exception as e:
+        logger.warning("could not measure session memory: %s", e)
+        return None
+
+# Function to get a derived artifact of a document (an index, a compressed version, ...) from the document
+# store, building and storing it the first time. `build` returns the stored form (a JSON value or a dict of
+# numpy arrays) and `load`, if given, turns that into the object callers use.
+def document_artifact(file_content, name, build, load=None):
+    key = document_store.text_key(file_content)
+    store = document_store.get_store()
+    value = store.get_artifact(key, name)
+    if value is None:
+        # Sessions asking for the same artifact at once wait for one build instead of each reading the document
+        with ARTIFACT_LOCKS[hash((key, name)) % len(ARTIFACT_LOCKS)]:
+            value = store.get_artifact(key, name)
+            if value is None:
+                value = build()
+                store.put_artifact(key, name, value)
+    return load(value) if load else value
+
+# Function to get responses from the Gemini model
+def get_gemini_response(input_text, file_content, mode="qa", stream=False):
+    from student_helper import llm #model calls through the shared cache and rate limiter
+
+    file_content = as_text(file_content)
+    # Prepare prompts based on the selected mode
+    if mode == "qa":
+        prompt = f"Based on the following content:\n\n{file_content}\n\nAnswer this question: {input_text}"
+    elif mode == "qa_passages":
+        prompt = (f"Answer the question using only the numbered passages below. "
+                  f"Cite the passages you used with their numbers in square brackets, e.g. [2]. "
+                  f"If the passages don't contain the answer, say so.\n\n{file_content}\n\nQuestion: {input_text}")
+    elif mode == "summarize":
+        prompt = f"Summarize the following content in bullet points:\n\n{file_content}"
+    elif mode == "quiz":
+        prompt = f"Based on the following content, generate 5 multiple-choice questions with answers:\n\n{file_content}"
+    if stream:
+        return llm.stream_text(get_model(), prompt, mode=mode)
+    return llm.generate_text(get_model(), prompt, mode=mode)
+
+# Function to shrink a document to a token budget with representative sentences from all of it, cached per document
+@st.cache_data(max_entries=32)
+def fit_document_to_budget(document_hash, _content, max_tokens):
+    from student_helper import compression #extractive pre-compression within a token budget
+
+    def build():
+        with reading_text(_content) as text:
+            # A document within the budget comes back as it is; the artifact is plain text
+            return str(compression.fit_to_budget(text, max_tokens))
+
+    return document_artifact(_content, f"quiz_content_{max_tokens}", build)
+
+# Function to get the content a quiz is generated from (subject requests are used as they are)
+def quiz_source_content(content, max_tokens=QUIZ_TOKEN_BUDGET):
+    if isinstance(content, str) and content.startswith("Generate a quiz about"):
+        return content
+    return fit_document_to_budget(document_store.text_key(content), content, max_tokens)
+
+# Function to save and provide download option for content
+def save_and_download(content, filename, key=None):
+    buffer = io.BytesIO()
+    buffer.write(content.encode())
+    buffer.seek(0)
+    
+    st.download_button(
+        label="Download Result",
+        data=buffer,
+        file_name=filename,
+        mime="text/plain",
+        key=key
+    )
+
+# Function to show the document uploader and return the text of the uploaded file
+def upload_document():
+    uploaded_file = st.file_uploader("Upload a file📁:", type=["txt", "pdf"])
+
+    if uploaded_file is not None:
+        file_content = read_file_content(uploaded_file)
+        
+        if file_content:
+            st.success("File uploaded successfully✅!")
+            return file_content
+    return None
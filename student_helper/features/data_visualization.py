@@ -0,0 +1,56 @@
+# Data Visualization: charts for (large) CSV files
+import hashlib #for hashing uploaded files
+import streamlit as st #for gui
+from student_helper import dataviz #large csv reading, downsampling and chart rendering
+from student_helper.features.common import save_and_download
+
+# Function to read the first rows of a CSV, cached by file hash
+@st.cache_data(max_entries=16)
+def load_csv_preview(file_hash, _data):
+    return dataviz.read_csv_preview(_data)
+
+# Function to read only the charted columns of a CSV, shared (not copied) between reruns and sessions
+@st.cache_resource(max_entries=4)
+def load_csv_columns(file_hash, _data, columns):
+    return dataviz.read_csv_columns(_data, columns)
+
+# Function to render a chart to an image, cached per file and selection
+@st.cache_data(max_entries=32)
+def render_csv_chart(file_hash, _data, x_column, y_column, chart_type):
+    frame = load_csv_columns(file_hash, _data, tuple(dict.fromkeys([x_column, y_column])))
+    return dataviz.render_chart(frame, x_column, y_column, chart_type)
+
+# Function to render the feature
+def render():
+    st.write("Upload a CSV file to visualize data")
+    uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
+    
+    if uploaded_file is not None:
+        csv_data = uploaded_file.getvalue()
+        csv_hash = hashlib.sha256(csv_data).hexdigest()
+        data = load_csv_preview(csv_hash, csv_data)
+        st.write("Data Preview:")
+        st.write(data)
+        
+        all_columns = data.columns.tolist()
+        
+        if len(all_columns) < 2:
+            st.warning("The uploaded CSV file doesn't contain enough columns for visualization. Please upload a file with at least two columns.")
+        else:
+            st.write("Choose your visualization options:")
+            x_column = st.selectbox("X-axis", all_columns)
+            y_column = st.selectbox("Y-axis", all_columns, index=1 if len(all_columns) > 1 else 0)
+            
+            chart_type = st.radio("Select chart type", ["Scatter", "Line", "Bar"])
+            
+            if st.button("Generate Visualization"):
+                try:
+                    # Create plot based on user selection (downsampled or aggregated, rendered once per selection)
+                    st.image(render_csv_chart(csv_hash, csv_data, x_column, y_column, chart_type))
+                    
+                    plot_description = f"Chart Type: {chart_type}\nX-axis: {x_column}\nY-axis: {y_column}"
+                    save_and_download(plot_description, "plot_description.txt")
+                except Exception as e:
+                    st.error(f"An error occurred while generating the visualization: {str(e)}")
+                    st.error("This may be due to incompatible data types for the selected columns and chart type.")
+                    st.error("Try selecting different columns or a different chart type.")
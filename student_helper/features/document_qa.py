@@ -0,0 +1,40 @@
+# Document Q&A: answer questions from the most relevant passages of an uploaded document
+import streamlit as st #for gui
+from student_helper import document_store #persistent store of extracted document text
+from student_helper import retrieval #offline passage retrieval for document Q&A
+from student_helper.features.common import (document_artifact, get_gemini_response, passage_spans, passages_from_spans,
+                                            reading_text, save_and_download, upload_document)
+
+# Function to build the retrieval index of a document as arrays, with passages saved as byte spans of the stored text
+def build_document_index(file_content):
+    with reading_text(file_content) as text:
+        index = retrieval.build_index(text)
+        spans = passage_spans(file_content, text, index.passages)
+    return dict(index.to_arrays(), spans=spans)
+
+# Function to turn saved index arrays back into an index; large documents keep their passages on disk
+def load_document_index(file_content, arrays):
+    return retrieval.PassageIndex.from_arrays(arrays, passages_from_spans(file_content, arrays["spans"]))
+
+# Function to build the retrieval index for a document once (kept in the document store) and keep it per document hash
+@st.cache_resource(max_entries=32)
+def get_document_index(document_hash, _file_content):
+    return document_artifact(_file_content, "passage_index", lambda: build_document_index(_file_content),
+                             load=lambda arrays: load_document_index(_file_content, arrays))
+
+# Function to render the feature
+def render():
+    file_content = upload_document()
+    if file_content:
+        user_question = st.text_input("Ask a question about the file uploaded📁:")
+        if user_question:
+            document_hash = document_store.text_key(file_content)
+            index = get_document_index(document_hash, file_content)
+            passages = index.search(user_question, retrieval.DEFAULT_TOP_K)
+            st.write("Student helper response:")
+            response = st.write_stream(
+                get_gemini_response(user_question, retrieval.format_passages(passages), mode="qa_passages", stream=True))
+            with st.expander("Passages used"):
+                for number, passage in retrieval.cited_passages(response, passages) or passages:
+                    st.markdown(f"**[{number + 1}]** {passage}")
+            save_and_download(response, "qa_response.txt")
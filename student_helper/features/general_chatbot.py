@@ -0,0 +1,38 @@
+# General Chatbot
+import streamlit as st #for gui
+from student_helper import llm #model calls through the shared cache and rate limiter
+from student_helper.features.common import get_model
+
+# Function for chatbot responses (with the conversation so far, if any)
+def chatbot_response(user_input, stream=False, conversation=None):
+    prompt = conversation.prompt_for(user_input) if conversation else f"User: {user_input}\nAssistant: "
+    if stream:
+        return llm.stream_text(get_model(), prompt, mode="chat")
+    return llm.generate_text(get_model(), prompt, mode="chat")
+
+# Function to render the feature
+def render():
+    from student_helper import conversation #multi-turn history with rolling summarization
+
+    st.write("Chat with our general-purpose AI assistant:")
+    if "chat_conversation" not in st.session_state:
+        st.session_state.chat_conversation = conversation.Conversation()
+    chat = st.session_state.chat_conversation
+
+    if chat.folded:
+        st.caption(f"{chat.folded} earlier messages are no longer shown; Johnify keeps a summary of them.")
+    for role, text in chat.messages:
+        with st.chat_message(role):
+            st.write(text)
+
+    user_input = st.chat_input("You:")
+    if user_input:
+        with st.chat_message("user"):
+            st.write(user_input)
+        with st.chat_message("assistant"):
+            reply = st.write_stream(chatbot_response(user_input, stream=True, conversation=chat))
+        chat.add_exchange(get_model(), user_input, reply)
+
+    if chat.messages and st.button("Clear conversation"):
+        st.session_state.chat_conversation = conversation.Conversation()
+        st.experimental_rerun()
@@ -0,0 +1,131 @@
+# Interactive Quiz: questions arrive in parallel batches and are answered one at a time
+import streamlit as st #for gui
+from student_helper import document_store #persistent store of extracted document text
+from student_helper import quizzes #parallel, structured quiz generation
+from student_helper.features.common import SUBJECTS, get_model, quiz_source_content, read_file_content
+
+# Function to start generating an interactive quiz; returns one future per batch of questions
+def generate_qui(content, difficulty, quiz_round=1):
+    # Uploaded files are compressed to the quiz token budget so questions cover the whole document
+    return quizzes.start_quiz(get_model(), quiz_source_content(content), difficulty, quiz_round)
+
+# Function to prepare the next quiz for the same content in the background
+def prefetch_qui(content, difficulty, quiz_round):
+    quizzes.prefetch_quiz(get_model(), quiz_source_content(content), difficulty, quiz_round)
+
+# Function to remember errors of background batches so the warning survives reruns
+def record_batch_errors(errors):
+    if errors:
+        st.session_state.setdefault("quiz_batch_errors", []).extend(errors)
+
+# Function to render the feature
+def render():
+    st.write("Interactive Quiz")
+    
+    quiz_source = st.radio("Choose quiz source:", ["Upload File", "Generate from Subject"])
+    
+    if quiz_source == "Upload File":
+        uploaded_file = st.file_uploader("Upload a file📁:", type=["txt", "pdf"], key="interactive_quiz_uploader")
+        if uploaded_file is not None:
+            file_content = read_file_content(uploaded_file)
+        else:
+            file_content = None
+    else:
+        subject = st.selectbox("Select a subject for the quiz:", SUBJECTS)
+        file_content = f"Generate a quiz about {subject}" if subject else None
+
+    difficulty = st.selectbox("Choose difficulty level:", ["Easy", "Intermediate", "Advanced"], key="interactive_quiz_difficulty")
+
+    if st.button("Generate Quiz", key="interactive_quiz_button") and file_content:
+        # Each new quiz for the same content and difficulty is a new round, so it isn't a repeat
+        round_key = (document_store.text_key(file_content), difficulty)
+        quiz_rounds = st.session_state.setdefault("quiz_rounds", {})
+        quiz_rounds[round_key] = quiz_rounds.get(round_key, 0) + 1
+
+        with st.spinner("Generating quiz..."):
+            questions, pending, errors = quizzes.wait_for_first_questions(
+                generate_qui(file_content, difficulty, quiz_rounds[round_key]))
+        if questions:
+            st.session_state.quiz = questions
+            st.session_state.quiz_pending = pending
+            st.session_state.current_question = 0
+            st.session_state.score = 0
+            st.session_state.quiz_completed = False
+            st.session_state.quiz_batch_errors = []
+            record_batch_errors(errors)
+            st.success("Quiz generated successfully! More questions are loading in the background.")
+            prefetch_qui(file_content, difficulty, quiz_rounds[round_key] + 1)
+        elif errors:
+            st.error(f"Failed to generate quiz: {errors[0]}. Please try again.")
+        else:
+            st.error("Failed to generate quiz. Please try again.")
+
+    # Add questions from batches that finished since the last rerun
+    if st.session_state.get('quiz_pending'):
+        st.session_state.quiz_pending, errors = quizzes.collect_batches(st.session_state.quiz_pending, st.session_state.quiz)
+        record_batch_errors(errors)
+
+    # Display quiz questions and handle user responses
+    if 'quiz' in st.session_state and not st.session_state.get('quiz_completed', False):
+        # The student is ahead of the background batches, so wait for the next one
+        if st.session_state.current_question >= len(st.session_state.quiz) and st.session_state.quiz_pending:
+            with st.spinner("Loading more questions..."):
+                more, st.session_state.quiz_pending, errors = quizzes.wait_for_first_questions(st.session_state.quiz_pending)
+            st.session_state.quiz.extend(more)
+            record_batch_errors(errors)
+
+        if st.session_state.get('quiz_batch_errors'):
+            batch_errors = st.session_state.quiz_batch_errors
+            st.warning(f"{len(batch_errors)} batch(es) of questions failed to load ({batch_errors[0]}), so the quiz is shorter.")
+
+        if st.session_state.current_question >= len(st.session_state.quiz):
+            st.session_state.quiz_completed = True
+        else:
+            question = st.session_state.quiz[st.session_state.current_question]
+
+            st.write(f"Question {st.session_state.current_question + 1}:")
+            st.write(question["question"])
+
+            user_answer = st.radio("Select your answer:", quizzes.OPTION_LETTERS,
+                                   format_func=lambda letter: f"{letter}) {question['options'][letter]}",
+                                   key=f"quiz_answer_{st.session_state.current_question}")
+
+            if st.button("Submit Answer"):
+                correct_answer = question["answer"]
+                if user_answer == correct_answer:
+                    st.success("Correct!")
+                    st.session_state.score += 1
+                else:
+                    st.error(f"Incorrect. The correct answer was {correct_answer}) {question['options'][correct_answer]}")
+
+                st.session_state.current_question += 1
+
+                if st.session_state.current_question >= len(st.session_state.quiz) and not st.session_state.quiz_pending:
+                    st.session_state.quiz_completed = True
+
+                st.experimental_rerun()
+
+    # Display quiz results
+    if 'quiz' in st.session_state and st.session_state.get('quiz_completed', False):
+        total_questions = len(st.session_state.quiz)
+        score = st.session_state.score
+        percentage = (score / total_questions) * 100
+
+        st.write(f"Quiz completed!")
+        st.write(f"Your score: {score}/{total_questions}")
+        st.write(f"Percentage: {percentage:.2f}%")
+
+        if percentage >= 90:
+            st.success("Excellent work! You've mastered this topic!")
+        elif percentage >= 70:
+            st.success("Great job! You have a good understanding of the material.")
+        elif percentage >= 50:
+            st.warning("Good effort! There's room for improvement. Keep studying!")
+        else:
+            st.error("You might need to review this topic more. Don't give up!")
+
+        if st.button("Start New Quiz"):
+            for key in list(st.session_state.keys()):
+                if key in ['quiz', 'quiz_pending', 'quiz_batch_errors', 'current_question', 'score', 'quiz_completed']:
+                    del st.session_state[key]
+            st.experimental_rerun()
@@ -0,0 +1,34 @@
+# Quiz Generation: a printable multiple-choice quiz from a document or a subject
+import streamlit as st #for gui
+from student_helper import llm #model calls through the shared cache and rate limiter
+from student_helper.features.common import SUBJECTS, get_model, quiz_source_content, read_file_content, save_and_download
+
+# Function to generate quiz (alternative version)
+def generate_quiz(file_content, difficulty):
+    prompt = f"Based on the following content, generate 15 multiple-choice questions at a {difficulty} level. For each question, provide 4 options (A, B, C, D) and indicate the correct answer. Format each question as follows:\n\nQ1. Question text\nA) Option A\nB) Option B\nC) Option C\nD) Option D\nCorrect Answer: X\n\nContent:\n{quiz_source_content(file_content)}"
+    return llm.generate_text(get_model(), prompt, mode="quiz")
+
+# Function to render the feature
+def render():
+    st.write("Quiz Generation")
+    
+    quiz_source = st.radio("Choose quiz source:", ["Upload File", "Generate from Subject"], key="quiz_gen_source")
+    
+    if quiz_source == "Upload File":
+        uploaded_file = st.file_uploader("Upload a file📁:", type=["txt", "pdf"], key="quiz_gen_uploader")
+        if uploaded_file is not None:
+            file_content = read_file_content(uploaded_file)
+        else:
+            file_content = None
+    else:
+        subject = st.selectbox("Select a subject for the quiz:", SUBJECTS, key="quiz_gen_subject")
+        file_content = f"Generate a quiz about {subject}" if subject else None
+
+    difficulty = st.selectbox("Choose difficulty level:", ["Easy", "Intermediate", "Advanced"], key="quiz_gen_difficulty")
+
+    if st.button("Generate Quiz", key="quiz_gen_button") and file_content:
+        with st.spinner("Generating quiz..."):
+            quiz = generate_quiz(file_content, difficulty)
+        st.write("Quiz generated:")
+        st.write(quiz)
+        save_and_download(quiz, "quiz.txt")
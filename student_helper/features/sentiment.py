@@ -0,0 +1,102 @@
+# Sentiment Analysis
+import time #for measuring rows per minute
+import streamlit as st #for gui
+from student_helper import llm #model calls through the shared cache and rate limiter
+from student_helper.features.common import get_model, save_and_download, upload_key
+
+# Function for sentiment analysis
+def analyze_sentiment(text):
+    prompt = f"Analyze the sentiment of the following text and categorize it as positive, negative, or neutral. Provide a brief explanation for your categorization:\n\n{text}"
+    return llm.generate_text(get_model(), prompt, mode="sentiment")
+
+# Function to get the columns of an uploaded CSV file, cached per upload
+@st.cache_data(max_entries=32)
+def dataset_columns(dataset_hash, _data):
+    from student_helper import bulk_sentiment #batched sentiment analysis of datasets
+
+    return bulk_sentiment.csv_columns(_data)
+
+# Function to get the texts of an uploaded dataset, parsed once per upload and column instead of on every rerun
+@st.cache_data(max_entries=32)
+def dataset_items(dataset_hash, _data, filename, column):
+    from student_helper import bulk_sentiment #batched sentiment analysis of datasets
+
+    return bulk_sentiment.read_items(_data, filename, column)
+
+# Function to render the bulk mode (a CSV column or one text per line, many texts per model call)
+def render_bulk():
+    from student_helper import bulk_sentiment #batched sentiment analysis of datasets
+
+    uploaded_file = st.file_uploader("Upload a dataset (CSV or one text per line)📁:", type=["csv", "txt"], key="sentiment_uploader")
+    if uploaded_file is None:
+        return
+
+    data = uploaded_file.getvalue()
+    data_hash = upload_key(uploaded_file)
+    column = None
+    if uploaded_file.name.lower().endswith(".csv"):
+        column = st.selectbox("Column to analyze", dataset_columns(data_hash, data), key="sentiment_column")
+    with st.expander("Settings"):
+        batch_size = st.slider("Texts per request", 5, 100, bulk_sentiment.DEFAULT_BATCH_SIZE, key="sentiment_batch_size")
+        max_workers = st.slider("Requests at a time", 1, 8, bulk_sentiment.DEFAULT_MAX_WORKERS, key="sentiment_workers")
+
+    texts = dataset_items(data_hash, data, uploaded_file.name, column)
+    st.write(f"{len(texts)} texts found.")
+
+    # Results are kept per dataset, so a failed run can be resumed without analyzing the finished rows again
+    dataset_key = f"{data_hash}:{column}"
+    if st.session_state.get("sentiment_dataset") != dataset_key:
+        st.session_state.sentiment_dataset = dataset_key
+        st.session_state.sentiment_results = {}
+        st.session_state.sentiment_status = None
+    results = st.session_state.sentiment_results
+
+    remaining = len(set(texts) - set(results))
+    label = "Analyze Dataset" if not results else f"Resume ({remaining} texts left)"
+    if remaining and st.button(label, key="sentiment_bulk_button"):
+        progress_bar = st.progress(0.0, text="Analyzing...")
+        started = time.perf_counter()
+        before = sum(text in results for text in texts)
+        errors = bulk_sentiment.analyze_items(
+            get_model(), texts, results, batch_size=batch_size, max_workers=max_workers,
+            progress=lambda done, total: progress_bar.progress(done / total, text=f"Analyzed batch {done} of {total}"),
+        )
+        progress_bar.empty()
+        elapsed = time.perf_counter() - started
+        analyzed = sum(text in results for text in texts) - before
+        st.session_state.sentiment_status = (analyzed, elapsed, errors)
+        # Rerun so the button reflects what is left to analyze
+        st.experimental_rerun()
+
+    if st.session_state.get("sentiment_status"):
+        analyzed, elapsed, errors = st.session_state.sentiment_status
+        st.caption(f"Analyzed {analyzed} rows in {elapsed:.1f}s ({analyzed / max(elapsed, 1e-9) * 60:,.0f} rows per minute).")
+        if errors:
+            st.error(f"{len(errors)} batch(es) failed; the finished rows are kept, press Resume to retry the rest.")
+
+    if results:
+        frame = bulk_sentiment.results_frame(texts, results)
+        st.write("Sentiment analysis")
+        st.bar_chart(frame[frame["label"] != ""]["label"].value_counts())
+        st.dataframe(frame, use_container_width=True)
+        st.download_button(
+            label="Download Result",
+            data=frame.to_csv(index=False).encode("utf-8"),
+            file_name="sentiment_analysis.csv",
+            mime="text/csv",
+        )
+
+# Function to render the feature
+def render():
+    mode = st.radio("Analyze", ["Single text", "Dataset (CSV/TXT)"], horizontal=True, key="sentiment_mode")
+    if mode != "Single text":
+        render_bulk()
+        return
+
+    text_for_analysis = st.text_area("Enter text for sentiment analysis:")
+    if st.button("Analyze Sentiment"):
+        with st.spinner("Generating sentiment..."):
+            sentiment = analyze_sentiment(text_for_analysis)
+        st.write("Sentiment analysis")
+        st.write(sentiment)
+        save_and_download(sentiment, "sentiment_analysis.txt")
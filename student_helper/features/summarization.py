@@ -0,0 +1,50 @@
+# Summarization: bullet-point summaries, map-reduced over chunks for large documents
+import streamlit as st #for gui
+from student_helper import summarizer #chunked map-reduce summarization for large documents
+from student_helper.features.common import (document_artifact, get_gemini_response, get_model, passage_spans, passages_from_spans,
+                                            reading_text, save_and_download, upload_document)
+
+# Function to split a document into summary chunks once, saved as byte spans of the stored text
+def build_chunks(file_content, chunk_size):
+    with reading_text(file_content) as text:
+        return {"spans": passage_spans(file_content, text, summarizer.split_into_chunks(text, chunk_size))}
+
+# Function to render the feature
+def render():
+    file_content = upload_document()
+    if file_content:
+        with st.expander("Summary settings"):
+            chunk_size = st.number_input("Chunk size (characters)", min_value=2000, max_value=100000,
+                                         value=summarizer.DEFAULT_CHUNK_SIZE, step=1000)
+            max_workers = st.slider("Chunks summarized at the same time", 1, 16,
+                                    summarizer.DEFAULT_MAX_WORKERS)
+
+        if st.button("Summarize Document"):
+            # Chunks of large documents are read from disk as they are summarized, not all at once
+            chunks = document_artifact(file_content, f"chunks_{chunk_size}", lambda: build_chunks(file_content, chunk_size),
+                                       load=lambda arrays: passages_from_spans(file_content, arrays["spans"]))
+            try:
+                if len(chunks) <= 1:
+                    # Small documents fit in a single prompt
+                    st.write("Summary of the file")
+                    summary = st.write_stream(get_gemini_response("", file_content, mode="summarize", stream=True))
+                else:
+                    # Large documents: summarize the chunks in parallel, then merge them
+                    st.write(f"The document was split into {len(chunks)} parts.")
+                    progress = st.progress(0.0, text="Summarizing parts...")
+                    partial_summaries = [None] * len(chunks)
+                    for done, (index, partial) in enumerate(
+                            summarizer.summarize_chunks(get_model(), chunks, max_workers), start=1):
+                        partial_summaries[index] = partial
+                        progress.progress(done / len(chunks), text=f"Summarized {done}/{len(chunks)} parts")
+                        with st.expander(f"Part {index + 1} summary"):
+                            st.write(partial)
+                    st.write("Summary of the file")
+                    summary = st.write_stream(
+                        summarizer.reduce_summaries(get_model(), partial_summaries, chunk_size, max_workers, stream=True))
+            except Exception as e:
+                st.error(f"An error occurred while summarizing the document: {str(e)}")
+                summary = None
+
+            if summary:
+                save_and_download(summary, "summary.txt")
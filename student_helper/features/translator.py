@@ -0,0 +1,59 @@
+# Translator
+import streamlit as st #for gui
+from student_helper import llm #model calls through the shared cache and rate limiter
+from student_helper.features.common import get_model, save_and_download
+
+# Function for text translation
+def translate_text(text, target_language, stream=False):
+    prompt = f"Translate the following text to {target_language}:\n\n{text}"
+    if stream:
+        return llm.stream_text(get_model(), prompt, mode="translate")
+    return llm.generate_text(get_model(), prompt, mode="translate")
+
+# Function to translate long texts (or several languages) sentence by sentence, reusing earlier translations
+def translate_segments(text, target_languages, progress=None):
+    from student_helper import translation #segmented translation with a translation memory
+
+    return translation.translate(get_model(), text, target_languages, progress=progress)
+
+# Function to render the feature
+def render():
+    from student_helper import translation #segmented translation with a translation memory
+
+    st.write("Enter text to translate:")
+    text_to_translate = st.text_area("Please type your text that you want to translate")
+    
+    # List of common languages
+    languages = [
+        "Arabic", "Bengali", "Chinese (Simplified)", "Chinese (Traditional)", "Dutch", 
+        "English", "French", "German", "Greek", "Hindi", "Italian", "Japanese", 
+        "Korean", "Portuguese", "Russian", "Spanish", "Swedish", "Turkish", "Urdu", "Kiswahili", 
+    ]
+    
+    target_languages = st.multiselect("Select the language(s) you want to translate to:", languages, default=languages[:1])
+    
+    if st.button("Translate"):
+        if text_to_translate and target_languages:
+            # Short text into one language: stream the reply as before
+            if len(target_languages) == 1 and len(text_to_translate) <= translation.BATCH_CHARS:
+                st.write("Translation:")
+                translation_text = st.write_stream(translate_text(text_to_translate, target_languages[0], stream=True))
+                save_and_download(translation_text, "translation.txt")
+            else:
+                progress_bar = st.progress(0.0, text="Translating...")
+                translations, failures = translate_segments(
+                    text_to_translate, target_languages,
+                    progress=lambda done, total: progress_bar.progress(done / total, text=f"Translated part {done} of {total}"),
+                )
+                progress_bar.empty()
+                if failures:
+                    failed = sum(len(sentences) for _, sentences, _ in failures)
+                    failed_languages = ", ".join(dict.fromkeys(language for language, _, _ in failures))
+                    st.warning(f"{failed} sentence(s) could not be translated to {failed_languages} ({failures[0][2]}) "
+                               "and are left as in the original. Press Translate again to retry them.")
+                for language, translation_text in translations.items():
+                    st.write(f"Translation ({language}):")
+                    st.write(translation_text)
+                    save_and_download(translation_text, f"translation_{language}.txt", key=f"translation_download_{language}")
+        else:
+            st.error("Please enter text to translate and select a target language.")
@@ -0,0 +1,107 @@
+# Single entry point for model calls, so every feature shares the response cache and the rate limiter
+import logging
+import time
+
+from student_helper import metrics, scheduler
+from student_helper.coalescer import Coalescer
+from student_helper.response_cache import get_cache, make_key
+from student_helper.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Requests in flight in this process, shared by every session
+_inflight = Coalescer()
+
+# Interactive features go ahead of bulk generation when the quota is tight
+MODE_PRIORITIES = {
+    "chat": scheduler.PRIORITY_INTERACTIVE,
+    "qa": scheduler.PRIORITY_INTERACTIVE,
+    "qa_passages": scheduler.PRIORITY_INTERACTIVE,
+    "translate": scheduler.PRIORITY_INTERACTIVE,
+    "sentiment": scheduler.PRIORITY_INTERACTIVE,
+    "summarize_part": scheduler.PRIORITY_BULK,
+    "quiz": scheduler.PRIORITY_BULK,
+    "sentiment_batch": scheduler.PRIORITY_BULK,
+}
+
+
+# Function to get a stable name for the model used in cache keys
+def model_name(model):
+    return getattr(model, "model_name", None) or type(model).__name__
+
+
+# Function to send a request through the shared scheduler
+def _schedule(model, prompt, mode, priority, **kwargs):
+    if priority is None:
+        priority = MODE_PRIORITIES.get(mode, scheduler.PRIORITY_NORMAL)
+    return scheduler.get_scheduler().run(
+        lambda: model.generate_content(prompt, **kwargs), priority=priority, tokens=estimate_tokens(prompt), feature=mode)
+
+
+# Function to generate text for a prompt, serving repeated prompts from the cache.
+# If `validate` is given it is called with the text and may raise ValueError; invalid text is not cached.
+# Identical requests already in flight (from any session) are joined instead of being sent again.
+def generate_text(model, prompt, mode="default", priority=None, validate=None):
+    cache = get_cache()
+    key = make_key(model_name(model), mode, prompt)
+    cached = cache.get(key, mode)
+    metrics.increment("cache_requests_total", feature=mode, result="miss" if cached is None else "hit")
+    if cached is not None:
+        return cached
+
+    def call():
+        # The previous flight for this key may have landed since the cache was checked
+        cached = cache.peek(key)
+        if cached is not None:
+            return cached
+        metrics.observe("prompt_tokens", estimate_tokens(prompt), metrics.TOKEN_BUCKETS, feature=mode)
+        with metrics.timed("model_call", feature=mode):
+            text = _schedule(model, prompt, mode, priority).text
+        metrics.observe("response_tokens", estimate_tokens(text), metrics.TOKEN_BUCKETS, feature=mode)
+        if validate is not None:
+            validate(text)
+        cache.set(key, mode, text)
+        return text
+
+    # Validated and unvalidated callers don't share a flight, so each gets the result it asked for
+    return _inflight.run(key + ":validated" if validate is not None else key, call, feature=mode)
+
+
+# Function to stream text for a prompt as it is generated; the full text is cached once complete.
+# Identical streams already in flight are followed (from their first chunk) instead of being sent again.
+def stream_text(model, prompt, mode="default", priority=None):
+    cache = get_cache()
+    key = make_key(model_name(model), mode, prompt)
+    cached = cache.get(key, mode)
+    metrics.increment("cache_requests_total", feature=mode, result="miss" if cached is None else "hit")
+    if cached is not None:
+        yield cached
+        return
+
+    def produce():
+        # The previous flight for this key may have landed since the cache was checked
+        cached = cache.peek(key)
+        if cached is not None:
+            yield cached
+            return
+        metrics.observe("prompt_tokens", estimate_tokens(prompt), metrics.TOKEN_BUCKETS, feature=mode)
+        started = time.perf_counter()
+        parts = []
+        with metrics.timed("model_call", feature=mode):
+            for chunk in _schedule(model, prompt, mode, priority, stream=True):
+                text = chunk.text
+                if not text:
+                    continue
+                if not parts:
+                    first_token = time.perf_counter() - started
+                    metrics.observe("model_first_token_seconds", first_token, feature=mode)
+                    logger.info("%s: first token after %.3fs", mode, first_token)
+                parts.append(text)
+                yield text
+        logger.info("%s: streamed %d characters in %.3fs", mode, sum(map(len, parts)), time.perf_counter() - started)
+        metrics.observe("response_tokens", estimate_tokens("".join(parts)), metrics.TOKEN_BUCKETS, feature=mode)
+
+        # Only complete responses are cached (the stream runs to the end even if its first viewer leaves)
+        cache.set(key, mode, "".join(parts))
+
+    yield from _inflight.stream(key, produce, feature=mode)
@@ -0,0 +1,257 @@
+# Memory governance for uploaded documents.
+# Sessions and caches hold DocumentRefs (key, name, size) instead of document text. Small documents are kept
+# in memory in one process-wide LRU within a global byte budget; documents above the spill threshold are never
+# held as text, they are read from their memory-mapped file in the document store when needed. Each session's
+# share (the documents it uses plus its session state) is measured and held to a per-session budget.
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from student_helper import document_store, metrics
+
+SPILL_THRESHOLD_BYTES = int(os.getenv("DOCUMENT_SPILL_BYTES", 8 * 1024 ** 2))
+GLOBAL_BUDGET_BYTES = int(os.getenv("MEMORY_BUDGET_BYTES", 512 * 1024 ** 2))
+SESSION_BUDGET_BYTES = int(os.getenv("SESSION_MEMORY_BUDGET_BYTES", 64 * 1024 ** 2))
+# Sessions not seen for this long are no longer tracked
+SESSION_IDLE_SECONDS = 3600
+# Seconds between measurements of a session's state (measuring walks all of it)
+SESSION_REPORT_SECONDS = 10
+# Objects visited at most when measuring one value
+MAX_MEASURED_OBJECTS = 20000
+
+
+class DocumentRef:
+    # Reference to a document in the document store; cheap to keep in session state and caches
+    __slots__ = ("key", "name", "type", "nbytes", "session_id")
+
+    def __init__(self, key, name, type, nbytes, session_id=None):
+        self.key = key
+        self.name = name
+        self.type = type
+        self.nbytes = nbytes
+        self.session_id = session_id
+
+    def __len__(self):
+        return self.nbytes
+
+    def __repr__(self):
+        return f"DocumentRef({self.name!r}, {self.nbytes} bytes)"
+
+    @property
+    def spilled(self):
+        return get_governor().is_spilled(self)
+
+    # Function to get the document text (kept in memory for small documents, read from disk for large ones)
+    def text(self):
+        return get_governor().text(self)
+
+    # Function to get the document text for the duration of a `with` block (see MemoryGovernor.reading)
+    def reading(self):
+        return get_governor().reading(self)
+
+
+# Function to estimate the memory held by an object and everything it refers to
+# (past MAX_MEASURED_OBJECTS objects only their own size is counted, to bound the cost)
+def approximate_size(value, _seen=None):
+    seen = set() if _seen is None else _seen
+    if id(value) in seen:
+        return 0
+    if len(seen) >= MAX_MEASURED_OBJECTS:
+        return sys.getsizeof(value, 0)
+    seen.add(id(value))
+    if isinstance(value, DocumentRef):
+        # Documents are accounted for separately
+        return sys.getsizeof(value)
+    if hasattr(value, "nbytes") and isinstance(getattr(value, "nbytes"), int):
+        return value.nbytes
+    size = sys.getsizeof(value, 0)
+    if isinstance(value, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+    if isinstance(value, dict):
+        return size + sum(approximate_size(k, seen) + approximate_size(v, seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(approximate_size(item, seen) for item in value)
+    if hasattr(value, "__dict__"):
+        return size + approximate_size(vars(value), seen)
+    return size
+
+
+class MemoryGovernor:
+    def __init__(self, global_budget=GLOBAL_BUDGET_BYTES, session_budget=SESSION_BUDGET_BYTES,
+                 spill_threshold=SPILL_THRESHOLD_BYTES):
+        self.global_budget = global_budget
+        self.session_budget = session_budget
+        self.spill_threshold = spill_threshold
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._texts = OrderedDict()  # key -> text of resident documents, least recently used first
+        self._resident_bytes = 0
+        self._reading_bytes = 0  # large documents decoded for a reading() block right now
+        self._sessions = {}  # session id -> {"documents": OrderedDict(key -> bytes), "state_bytes", "last_seen"}
+
+    def is_spilled(self, ref):
+        return ref.nbytes > self.spill_threshold
+
+    def _session(self, session_id):
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = {"documents": OrderedDict(), "state_bytes": 0, "last_seen": 0.0,
+                                                    "reported": 0.0}
+        session["last_seen"] = time.time()
+        return session
+
+    # Function to read a document's text from the store
+    def _load(self, ref):
+        document = document_store.get_store().open(ref.key)
+        if document is None:
+            raise LookupError(f"{ref.name} is no longer in the document store; please upload it again")
+        try:
+            return document_store.DocumentText(document.text(), ref.key)
+        finally:
+            document.close()
+
+    # Function to get the text of a document
+    def text(self, ref):
+        with self._lock:
+            if ref.session_id is not None:
+                documents = self._session(ref.session_id)["documents"]
+                documents[ref.key] = ref.nbytes
+                documents.move_to_end(ref.key)
+            entry = self._texts.get(ref.key)
+            if entry is not None:
+                self._texts.move_to_end(ref.key)
+        if entry is not None:
+            metrics.increment("document_text_reads_total", result="memory")
+            return entry[0]
+
+        text = self._load(ref)
+        if self.is_spilled(ref):
+            # Large documents are only held by the caller for as long as it needs them
+            metrics.increment("document_text_reads_total", result="spilled")
+            return text
+        metrics.increment("document_text_reads_total", result="store")
+        with self._lock:
+            if ref.key not in self._texts:
+                self._texts[ref.key] = (text, ref.nbytes)
+                self._resident_bytes += ref.nbytes
+            self._enforce(ref.session_id)
+        return text
+
+    # Function to read a document's text for the duration of a `with` block. The text of a large document
+    # counts against the global budget while the block runs; reads that would pass the budget first drop
+    # resident documents, then wait for other reads to finish (one read always goes ahead).
+    @contextmanager
+    def reading(self, ref):
+        if not self.is_spilled(ref):
+            yield self.text(ref)
+            return
+
+        with self._condition:
+            while self._resident_bytes + self._reading_bytes + ref.nbytes > self.global_budget:
+                if self._texts:
+                    self._release(next(iter(self._texts)), "reading")
+                elif self._reading_bytes:
+                    self._condition.wait()
+                else:
+                    break
+            self._reading_bytes += ref.nbytes
+            metrics.set_gauge("document_reading_bytes", self._reading_bytes)
+        try:
+            if ref.session_id is not None:
+                with self._lock:
+                    self._session(ref.session_id)["documents"][ref.key] = ref.nbytes
+            metrics.increment("document_text_reads_total", result="spilled")
+            yield self._load(ref)
+        finally:
+            with self._condition:
+                self._reading_bytes -= ref.nbytes
+                metrics.set_gauge("document_reading_bytes", self._reading_bytes)
+                self._condition.notify_all()
+
+    # Function to drop a resident document (its text stays in the document store)
+    def _release(self, key, reason):
+        entry = self._texts.pop(key, None)
+        if entry is not None:
+            self._resident_bytes -= entry[1]
+            metrics.increment("document_evictions_total", reason=reason)
+
+    # Function to enforce the session and global budgets (called with the lock held)
+    def _enforce(self, session_id=None):
+        now = time.time()
+        for idle in [sid for sid, session in self._sessions.items() if now - session["last_seen"] > SESSION_IDLE_SECONDS]:
+            del self._sessions[idle]
+
+        session = self._sessions.get(session_id)
+        if session is not None:
+            # A session over its budget gives up its least recently used documents, keeping the current one
+            while len(session["documents"]) > 1 and self._session_total(session) > self.session_budget:
+                key, _ = session["documents"].popitem(last=False)
+                if not any(key in other["documents"] for other in self._sessions.values()):
+                    self._release(key, "session")
+
+        while self._resident_bytes + self._reading_bytes > self.global_budget and len(self._texts) > 1:
+            self._release(next(iter(self._texts)), "global")
+        metrics.set_gauge("document_resident_bytes", self._resident_bytes)
+        metrics.set_gauge("document_resident_count", len(self._texts))
+        metrics.set_gauge("tracked_sessions", len(self._sessions))
+
+    # Function to get the bytes a session holds: its resident documents plus its session state
+    def _session_total(self, session):
+        return sum(size for key, size in session["documents"].items() if key in self._texts) + session["state_bytes"]
+
+    # Function to check whether a session's state is due to be measured again
+    def report_due(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session is None or time.time() - session["reported"] >= SESSION_REPORT_SECONDS
+
+    # Function to record the size of a session's state
+    def report_session(self, session_id, state_bytes):
+        with self._lock:
+            session = self._session(session_id)
+            session["state_bytes"] = state_bytes
+            session["reported"] = time.time()
+            self._enforce(session_id)
+
+    # Function to get one session's memory use
+    def session_usage(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return {"resident_bytes": 0, "mapped_bytes": 0, "state_bytes": 0, "total_bytes": 0, "documents": 0}
+            resident = sum(size for key, size in session["documents"].items() if key in self._texts)
+            mapped = sum(size for size in session["documents"].values() if size > self.spill_threshold)
+            return {"resident_bytes": resident, "mapped_bytes": mapped, "state_bytes": session["state_bytes"],
+                    "total_bytes": self._session_total(session), "documents": len(session["documents"])}
+
+    # Function to summarise memory use for the Metrics page
+    def snapshot(self):
+        sessions = {session_id: self.session_usage(session_id) for session_id in list(self._sessions)}
+        with self._lock:
+            return {"resident_documents": len(self._texts), "resident_bytes": self._resident_bytes,
+                    "reading_bytes": self._reading_bytes,
+                    "global_budget_bytes": self.global_budget, "session_budget_bytes": self.session_budget,
+                    "spill_threshold_bytes": self.spill_threshold, "sessions": sessions}
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+
+# Function to get the process-wide memory governor
+def get_governor():
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = MemoryGovernor()
+        return _governor
+
+
+# Function to replace the process-wide memory governor
+def set_governor(governor):
+    global _governor
+    with _governor_lock:
+        _governor = governor
@@ -0,0 +1,217 @@
+# In-process metrics: counters and latency/size histograms, exported as Prometheus text or JSON
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+DEFAULT_EXPORT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")
+EXPORT_INTERVAL = 15  # seconds
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    # Function to estimate a quantile from the bucket counts (upper bound of the bucket it falls in).
+    # Values past the last bucket are reported as that bound, so the result stays valid JSON.
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        target, seen = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.buckets[-1]
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._buckets = {}
+        self._gauges = {}
+
+    def increment(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def set_gauge(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    # Function to get a JSON-serialisable copy of every metric
+    def snapshot(self):
+        with self._lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            histograms = [{"name": name, "labels": dict(labels), "count": h.count, "sum": h.sum,
+                           "p50": h.quantile(0.5), "p95": h.quantile(0.95),
+                           "buckets": dict(zip([str(b) for b in h.buckets] + ["+Inf"], h.counts))}
+                          for (name, labels), h in sorted(self._histograms.items())]
+            gauges = [{"name": name, "labels": dict(labels), "value": value}
+                      for (name, labels), value in sorted(self._gauges.items())]
+        return {"timestamp": time.time(), "counters": counters, "histograms": histograms, "gauges": gauges}
+
+    # Function to render every metric in the Prometheus text exposition format
+    def to_prometheus(self):
+        def label_text(labels, extra=None):
+            items = list(labels.items()) + ([extra] if extra else [])
+            if not items:
+                return ""
+            escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in items)
+            return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(items, escaped)) + "}"
+
+        snapshot = self.snapshot()
+        lines = []
+        typed = set()
+
+        # Function to add the TYPE line the first time a metric name appears
+        def declare(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for counter in snapshot["counters"]:
+            declare(f"student_helper_{counter['name']}", "counter")
+            lines.append(f"student_helper_{counter['name']}{label_text(counter['labels'])} {counter['value']}")
+        for gauge in snapshot["gauges"]:
+            declare(f"student_helper_{gauge['name']}", "gauge")
+            lines.append(f"student_helper_{gauge['name']}{label_text(gauge['labels'])} {gauge['value']}")
+        for histogram in snapshot["histograms"]:
+            name, labels, cumulative = f"student_helper_{histogram['name']}", histogram["labels"], 0
+            declare(name, "histogram")
+            for bound, count in histogram["buckets"].items():
+                cumulative += count
+                lines.append(f"{name}_bucket{label_text(labels, ('le', bound))} {cumulative}")
+            lines.append(f"{name}_sum{label_text(labels)} {histogram['sum']}")
+            lines.append(f"{name}_count{label_text(labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._gauges.clear()
+
+
+registry = Registry()
+
+
+# Function to count an event, e.g. increment("model_errors_total", feature="quiz")
+def increment(name, amount=1, **labels):
+    registry.increment(name, amount, **labels)
+
+
+# Function to record a value in a histogram
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    registry.observe(name, value, buckets, **labels)
+
+
+# Function to record the current value of something, e.g. set_gauge("document_resident_bytes", 1024)
+def set_gauge(name, value, **labels):
+    registry.set_gauge(name, value, **labels)
+
+
+# Context manager to time a block into a latency histogram (errors are counted separately)
+@contextmanager
+def timed(name, **labels):
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        increment(f"{name}_errors_total", **labels)
+        raise
+    finally:
+        observe(f"{name}_seconds", time.perf_counter() - started, **labels)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/metrics.json"):
+            body, content_type = json.dumps(registry.snapshot()).encode(), "application/json"
+        else:
+            body, content_type = registry.to_prometheus().encode(), "text/plain; version=0.0.4"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+# Function to write metrics.prom and metrics.json to the export directory
+def export_files(directory=DEFAULT_EXPORT_DIR):
+    os.makedirs(directory, exist_ok=True)
+    for filename, content in (("metrics.prom", registry.to_prometheus()),
+                              ("metrics.json", json.dumps(registry.snapshot(), indent=2))):
+        temporary_path = os.path.join(directory, filename + ".tmp")
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(temporary_path, os.path.join(directory, filename))
+
+
+_exporter_started = False
+_exporter_lock = threading.Lock()
+
+
+# Function to start exporting (once per process): files every few seconds, plus an HTTP endpoint if METRICS_PORT is set
+def start_exporter():
+    global _exporter_started
+    with _exporter_lock:
+        if _exporter_started:
+            return
+        _exporter_started = True
+
+    directory = os.getenv("METRICS_EXPORT_DIR", DEFAULT_EXPORT_DIR)
+
+    def export_loop():
+        while True:
+            time.sleep(EXPORT_INTERVAL)
+            try:
+                export_files(directory)
+            except OSError:
+                pass
+
+    threading.Thread(target=export_loop, name="metrics-export", daemon=True).start()
+
+    port = os.getenv("METRICS_PORT")
+    if port:
+        try:
+            server = ThreadingHTTPServer(("127.0.0.1", int(port)), _MetricsHandler)
+        except (OSError, ValueError) as e:
+            # e.g. another replica already serves this port; the files are still exported
+            logger.warning("could not serve metrics on port %s: %s", port, e)
+            return
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
@@ -0,0 +1,116 @@
+# Shared PDF text extraction: pages are extracted in a process pool and returned page by page
+import io
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import PyPDF2
+
+from student_helper import metrics
+
+logger = logging.getLogger(__name__)
+
+# Documents with fewer pages than this are extracted in-process (a pool round trip isn't worth it)
+PARALLEL_MIN_PAGES = 32
+# Number of pages used for previews
+PREVIEW_PAGES = 3
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# Function to get the number of extraction worker processes
+def worker_count():
+    return int(os.getenv("PDF_EXTRACTION_WORKERS", os.cpu_count() or 1))
+
+
+# Function to get the shared process pool, created on first use
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn avoids forking the multi-threaded Streamlit server
+            _pool = ProcessPoolExecutor(max_workers=worker_count(), mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+# Function to run `function(*args)` in the shared pool; a pool broken by a dead worker is replaced once
+def submit(function, *args):
+    global _pool
+    pool = get_pool()
+    try:
+        return pool.submit(function, *args)
+    except BrokenProcessPool:
+        logger.warning("extraction pool is broken, starting a new one")
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        pool.shutdown(wait=False)
+        return get_pool().submit(function, *args)
+
+
+# Function to extract the text of pages [start, end) from PDF bytes
+def _extract_range(data, start, end):
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+# Function to extract the text of pages [start, end) from a PDF file (runs inside the workers)
+def _extract_file_range(path, start, end):
+    with open(path, "rb") as file:
+        reader = PyPDF2.PdfReader(file)
+        return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+# Function to split pages [start, end) into one contiguous range per worker
+def _split_range(start, end, parts):
+    size = -(-(end - start) // parts)
+    return [(first, min(first + size, end)) for first in range(start, end, size)]
+
+
+# Function to count the pages of a PDF
+def count_pages(data):
+    return len(PyPDF2.PdfReader(io.BytesIO(data)).pages)
+
+
+# Function to yield page texts in order for pages [start, end), extracting batches in parallel
+def iter_pages(data, start=0, end=None, parallel=True):
+    total = count_pages(data)
+    end = total if end is None else min(end, total)
+    start = max(0, start)
+    if start >= end:
+        return
+
+    started = time.perf_counter()
+    if not parallel or end - start < PARALLEL_MIN_PAGES:
+        yield from _extract_range(data, start, end)
+    else:
+        # The bytes go to a temporary file once, so workers only receive its path and
+        # each one parses the PDF for a single contiguous range
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as file:
+            file.write(data)
+        futures = []
+        try:
+            ranges = _split_range(start, end, worker_count())
+            futures = [submit(_extract_file_range, file.name, first, last) for first, last in ranges]
+            for future in futures:
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+            os.remove(file.name)
+
+    seconds = time.perf_counter() - started
+    metrics.observe("pdf_extraction_seconds", seconds)
+    metrics.increment("pdf_pages_extracted_total", end - start)
+    logger.info("extracted %d pages in %.2fs (%.1f pages/sec)", end - start, seconds, (end - start) / max(seconds, 1e-9))
+
+
+# Function to extract pages [start, end) as a list of page texts
+def extract_pages(data, start=0, end=None, parallel=True):
+    return list(iter_pages(data, start, end, parallel))
@@ -0,0 +1,128 @@
+# Structured quiz generation: several small JSON batches requested in parallel, validated and de-duplicated
+import json
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from student_helper import llm
+
+# Default settings (questions per quiz, questions per request and attempts per batch)
+DEFAULT_QUESTIONS = 15
+DEFAULT_BATCH_SIZE = 5
+MAX_ATTEMPTS = 3
+OPTION_LETTERS = ["A", "B", "C", "D"]
+
+BATCH_PROMPT = """Generate {count} multiple-choice questions at a {difficulty} level for the content below.
+This is question set {batch} of {batches} for quiz #{quiz_round}; cover different aspects than the other sets would.
+Reply with JSON only, no other text, using exactly this format:
+{{"questions": [{{"question": "...", "options": {{"A": "...", "B": "...", "C": "...", "D": "..."}}, "answer": "A"}}]}}
+{retry_note}
+Content:
+{content}"""
+
+_executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix="quiz")
+_prefetched = set()
+_prefetched_lock = threading.Lock()
+
+
+# Function to normalise question text for de-duplication
+def _question_key(question):
+    return re.sub(r"\W+", " ", question["question"].lower()).strip()
+
+
+# Function to parse and validate a model reply; raises ValueError if it doesn't match the schema
+def parse_questions(text):
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if not match:
+        raise ValueError("no JSON object in the reply")
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON: {e}") from e
+
+    questions = []
+    for item in data.get("questions", []) if isinstance(data, dict) else []:
+        if not isinstance(item, dict):
+            continue
+        options = item.get("options")
+        answer = str(item.get("answer", "")).strip().upper()[:1]
+        if (not str(item.get("question", "")).strip() or not isinstance(options, dict)
+                or any(not str(options.get(letter, "")).strip() for letter in OPTION_LETTERS)
+                or answer not in OPTION_LETTERS):
+            continue
+        questions.append({
+            "question": str(item["question"]).strip(),
+            "options": {letter: str(options[letter]).strip() for letter in OPTION_LETTERS},
+            "answer": answer,
+        })
+    if not questions:
+        raise ValueError("no valid questions in the reply")
+    return questions
+
+
+# Function to generate one batch of questions, retrying just this batch if the reply is unusable
+def generate_batch(model, content, difficulty, batch, batches, count, quiz_round=1):
+    last_error = None
+    for attempt in range(MAX_ATTEMPTS):
+        retry_note = "" if attempt == 0 else f"(Attempt {attempt + 1}: the previous reply was not valid JSON in this format.)\n"
+        prompt = BATCH_PROMPT.format(count=count, difficulty=difficulty, batch=batch, batches=batches,
+                                     quiz_round=quiz_round, retry_note=retry_note, content=content)
+        try:
+            return parse_questions(llm.generate_text(model, prompt, mode="quiz", validate=parse_questions))
+        except ValueError as e:
+            last_error = e
+    raise ValueError(f"question set {batch} failed after {MAX_ATTEMPTS} attempts: {last_error}")
+
+
+# Function to start all batches of a quiz concurrently; returns one future per batch
+def start_quiz(model, content, difficulty, quiz_round=1, total=DEFAULT_QUESTIONS, batch_size=DEFAULT_BATCH_SIZE):
+    batches = max(1, -(-total // batch_size))
+    return [
+        _executor.submit(generate_batch, model, content, difficulty, batch, batches,
+                         min(batch_size, total - (batch - 1) * batch_size), quiz_round)
+        for batch in range(1, batches + 1)
+    ]
+
+
+# Function to warm the cache with the next quiz for the same content and difficulty (fire and forget)
+def prefetch_quiz(model, content, difficulty, quiz_round, **kwargs):
+    key = (llm.model_name(model), content, difficulty, quiz_round)
+    with _prefetched_lock:
+        if key in _prefetched:
+            return
+        if len(_prefetched) >= 1000:
+            _prefetched.clear()
+        _prefetched.add(key)
+    start_quiz(model, content, difficulty, quiz_round, **kwargs)
+
+
+# Function to add the questions of finished batches to a quiz, skipping duplicates.
+# Returns the futures that are still running and the errors of failed batches.
+def collect_batches(futures, questions):
+    seen = {_question_key(question) for question in questions}
+    running, errors = [], []
+    for future in futures:
+        if not future.done():
+            running.append(future)
+            continue
+        try:
+            batch = future.result()
+        except Exception as e:
+            errors.append(e)
+            continue
+        for question in batch:
+            key = _question_key(question)
+            if key not in seen:
+                seen.add(key)
+                questions.append(question)
+    return running, errors
+
+
+# Function to block until at least one batch has produced questions (or every batch has failed)
+def wait_for_first_questions(futures):
+    questions, running, errors = [], list(futures), []
+    while running and not questions:
+        wait(running, return_when=FIRST_COMPLETED)
+        running, failed = collect_batches(running, questions)
+        errors.extend(failed)
+    return questions, running, errors
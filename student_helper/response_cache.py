@@ -0,0 +1,217 @@
+# Persistent, content-addressed cache for model responses, shared by every page and process
+import abc
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Default settings, overridable with environment variables
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "responses.sqlite3")
+DEFAULT_MAX_ENTRIES = 20000
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+# How long responses stay fresh for each mode (seconds), None means forever
+DEFAULT_TTL = 7 * 24 * 3600
+MODE_TTLS = {
+    "qa": 7 * 24 * 3600,
+    "qa_passages": 7 * 24 * 3600,
+    "summarize": 30 * 24 * 3600,
+    "summarize_part": 30 * 24 * 3600,
+    "summarize_merge": 30 * 24 * 3600,
+    "quiz": 24 * 3600,
+    "sentiment": 30 * 24 * 3600,
+    "sentiment_batch": 30 * 24 * 3600,
+    "translate": 30 * 24 * 3600,
+    "chat": 3600,
+    "chat_summary": 3600,
+}
+
+
+# Function to normalize a prompt so insignificant whitespace doesn't cause misses
+# (only trailing spaces per line and surrounding blank space, layout is kept)
+def normalize_prompt(prompt):
+    return re.sub(r"[ \t]+$", "", prompt.strip(), flags=re.MULTILINE)
+
+
+# Function to build the cache key from (model name, mode, normalized prompt)
+def make_key(model_name, mode, prompt):
+    digest = hashlib.sha256()
+    for part in (model_name, mode, normalize_prompt(prompt)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ResponseCache(abc.ABC):
+    # Base class: keeps the hit/miss counters and TTL lookup, backends store the entries
+    def __init__(self, ttls=None, default_ttl=DEFAULT_TTL):
+        self.ttls = dict(MODE_TTLS, **(ttls or {}))
+        self.default_ttl = default_ttl
+        self.hits = {}
+        self.misses = {}
+        self._counter_lock = threading.Lock()
+
+    def ttl_for(self, mode):
+        return self.ttls.get(mode, self.default_ttl)
+
+    def get(self, key, mode):
+        value = self._get(key, time.time())
+        with self._counter_lock:
+            counters = self.hits if value is not None else self.misses
+            counters[mode] = counters.get(mode, 0) + 1
+        return value
+
+    # Function to look up an entry without counting a hit or miss (e.g. a second look after waiting)
+    def peek(self, key):
+        return self._get(key, time.time())
+
+    def set(self, key, mode, value):
+        ttl = self.ttl_for(mode)
+        self._set(key, mode, value, time.time() + ttl if ttl else None)
+
+    def stats(self):
+        with self._counter_lock:
+            modes = sorted(set(self.hits) | set(self.misses))
+            return {mode: {"hits": self.hits.get(mode, 0), "misses": self.misses.get(mode, 0)} for mode in modes}
+
+    @abc.abstractmethod
+    def _get(self, key, now):
+        pass
+
+    @abc.abstractmethod
+    def _set(self, key, mode, value, expires_at):
+        pass
+
+    @abc.abstractmethod
+    def clear(self):
+        pass
+
+
+class MemoryCache(ResponseCache):
+    # In-process LRU backend (used when no cache file is wanted, e.g. in benchmarks)
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, **kwargs):
+        super().__init__(**kwargs)
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key, now):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= now:
+                return None
+            # Re-insert to mark as most recently used
+            self._entries[key] = entry
+            return value
+
+    def _set(self, key, mode, value, expires_at):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, expires_at)
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache(ResponseCache):
+    # Disk-backed LRU backend; the file is shared by every process on the same host
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, mode TEXT, value TEXT, size INTEGER, "
+            "expires_at REAL, last_access REAL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+
+    def _get(self, key, now):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._connection.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            return value
+
+    def _set(self, key, mode, value, expires_at):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, mode, value, size, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, mode, value, len(value.encode("utf-8")), expires_at, time.time()),
+            )
+            self._evict()
+
+    # Function to drop expired entries, then the least recently used ones until within the limits
+    def _evict(self):
+        self._connection.execute("DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+        count, total = self._connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        excess_bytes = total - self.max_bytes
+        excess_entries = count - self.max_entries
+        removed = []
+        for key, size in self._connection.execute("SELECT key, size FROM responses ORDER BY last_access"):
+            if excess_entries <= 0 and excess_bytes <= 0:
+                break
+            removed.append((key,))
+            excess_entries -= 1
+            excess_bytes -= size
+        self._connection.executemany("DELETE FROM responses WHERE key = ?", removed)
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+# Function to get the process-wide cache, configured from the environment on first use
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            backend = os.getenv("RESPONSE_CACHE_BACKEND", "sqlite").lower()
+            max_entries = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+            if backend == "memory":
+                _cache = MemoryCache(max_entries=max_entries)
+            else:
+                _cache = SQLiteCache(
+                    path=os.getenv("RESPONSE_CACHE_PATH", DEFAULT_CACHE_PATH),
+                    max_entries=max_entries,
+                    max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+                )
+        return _cache
+
+
+# Function to swap the process-wide cache (e.g. for benchmarks or a different backend)
+def set_cache(cache):
+    global _cache
+    with _cache_lock:
+        _cache = cache
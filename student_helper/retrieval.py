@@ -0,0 +1,114 @@
+# Offline BM25 retrieval over document passages, so Q&A only sends the relevant parts to the model
+import re
+
+import numpy as np
+
+from student_helper.summarizer import split_into_chunks
+
+# Default settings (characters per passage and passages sent with each question)
+DEFAULT_PASSAGE_SIZE = 1500
+DEFAULT_TOP_K = 5
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+# Function to lower-case and split text into word tokens
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class PassageIndex:
+    # Build a BM25 index stored as term-major sparse arrays (CSR layout with one row per term)
+    def __init__(self, passages):
+        self.passages = passages
+        self.vocabulary = {}
+
+        term_ids, doc_ids, counts = [], [], []
+        lengths = np.zeros(len(passages), dtype=np.float64)
+        for doc_id, passage in enumerate(passages):
+            tokens = tokenize(passage)
+            lengths[doc_id] = len(tokens)
+            frequencies = {}
+            for token in tokens:
+                frequencies[token] = frequencies.get(token, 0) + 1
+            for token, count in frequencies.items():
+                term_ids.append(self.vocabulary.setdefault(token, len(self.vocabulary)))
+                doc_ids.append(doc_id)
+                counts.append(count)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind="stable")
+        self.doc_ids = np.asarray(doc_ids, dtype=np.int64)[order]
+        self.counts = np.asarray(counts, dtype=np.float64)[order]
+        self.indptr = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(self.vocabulary)), out=self.indptr[1:])
+
+        # Precompute the per-passage length normalisation and per-term idf
+        average_length = lengths.mean() if len(passages) else 0.0
+        self.length_norm = K1 * (1 - B + B * lengths / average_length) if average_length else np.full(len(passages), K1)
+        document_frequency = np.diff(self.indptr).astype(np.float64)
+        self.idf = np.log(1 + (len(passages) - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    # Function to get the index as numpy arrays (without the passages), e.g. to save it in the document store.
+    # The vocabulary is one UTF-8 buffer of newline-separated terms (tokens never contain a newline) with
+    # the offset of each term, rather than a fixed-width string array sized by the longest term.
+    def to_arrays(self):
+        terms = "\n".join(self.vocabulary).encode("utf-8")
+        lengths = [len(term.encode("utf-8")) + 1 for term in self.vocabulary]
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return {"terms": np.frombuffer(terms, dtype=np.uint8), "term_offsets": offsets, "doc_ids": self.doc_ids,
+                "counts": self.counts, "indptr": self.indptr, "length_norm": self.length_norm, "idf": self.idf}
+
+    # Function to recreate an index from to_arrays() output and its passages, without re-tokenizing them
+    @classmethod
+    def from_arrays(cls, arrays, passages):
+        index = cls.__new__(cls)
+        index.passages = passages
+        terms = arrays["terms"].tobytes().decode("utf-8").split("\n") if len(arrays["term_offsets"]) > 1 else []
+        index.vocabulary = {term: term_id for term_id, term in enumerate(terms)}
+        for name in ("doc_ids", "counts", "indptr", "length_norm", "idf"):
+            setattr(index, name, arrays[name])
+        return index
+
+    # Function to score every passage against a query
+    def score(self, query):
+        scores = np.zeros(len(self.passages), dtype=np.float64)
+        for token in set(tokenize(query)):
+            term_id = self.vocabulary.get(token)
+            if term_id is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            docs, tf = self.doc_ids[start:end], self.counts[start:end]
+            scores[docs] += self.idf[term_id] * tf * (K1 + 1) / (tf + self.length_norm[docs])
+        return scores
+
+    # Function to get the top-k (passage number, passage) pairs, in document order
+    def search(self, query, top_k=DEFAULT_TOP_K):
+        if not self.passages:
+            return []
+        scores = self.score(query)
+        top_k = min(top_k, len(self.passages))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = [i for i in best if scores[i] > 0] or list(range(top_k))
+        return [(int(i), self.passages[i]) for i in sorted(best)]
+
+
+# Function to chunk a document once and build its index
+def build_index(text, passage_size=DEFAULT_PASSAGE_SIZE):
+    return PassageIndex(split_into_chunks(text, passage_size))
+
+
+# Function to format retrieved passages as numbered context for the prompt
+def format_passages(results):
+    return "\n\n".join(f"[{number + 1}] {passage}" for number, passage in results)
+
+
+# Function to find which passage numbers an answer cites, e.g. "[3]"
+def cited_passages(answer, results):
+    cited = {int(n) for n in re.findall(r"\[(\d+)\]", answer)}
+    return [(number, passage) for number, passage in results if number + 1 in cited]
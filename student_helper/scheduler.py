@@ -0,0 +1,162 @@
+# Process-wide scheduler for model calls: token-bucket rate limits, priorities and backoff on quota errors
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+
+from google.api_core import exceptions as google_exceptions
+
+from student_helper import metrics
+
+logger = logging.getLogger(__name__)
+
+# Priorities (lower runs first)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BULK = 2
+
+# Default limits, overridable with environment variables
+DEFAULT_RPM = 60
+DEFAULT_TPM = 120000
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 30.0
+
+# Errors that mean "slow down and try again"
+RETRYABLE_ERRORS = (google_exceptions.ResourceExhausted, google_exceptions.ServiceUnavailable)
+
+
+class TokenBucket:
+    # Holds up to `capacity` tokens, refilled continuously at `capacity` per minute
+    def __init__(self, capacity):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Function to get how long until `amount` tokens are available (0 if they are now)
+    def wait_time(self, amount, now):
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+    # Function to empty the bucket, used when the API says we've hit the quota anyway
+    def drain(self):
+        self.tokens = 0.0
+
+
+class CallScheduler:
+    def __init__(self, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM, max_retries=DEFAULT_MAX_RETRIES,
+                 base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._condition = threading.Condition()
+        # Waiting tickets, mapped to the time before which they may not run (retries back off there)
+        self._waiting = {}
+        self._sequence = itertools.count()
+        self._metrics = {"calls": 0, "retries": 0, "failures": 0, "max_queue_depth": 0,
+                         "total_wait_seconds": 0.0, "max_wait_seconds": 0.0}
+
+    # Function to block until this caller is first in priority order among the tickets that are
+    # due, and both buckets allow the call
+    def _acquire(self, priority, tokens, not_before=0.0):
+        ticket = (priority, next(self._sequence))
+        started = time.monotonic()
+        with self._condition:
+            self._waiting[ticket] = not_before
+            self._metrics["max_queue_depth"] = max(self._metrics["max_queue_depth"], len(self._waiting))
+            # Wake the current head so a higher-priority ticket can take its place
+            self._condition.notify_all()
+            try:
+                while True:
+                    now = time.monotonic()
+                    timeout = None
+                    if not_before > now:
+                        timeout = not_before - now
+                    elif min(t for t, due in self._waiting.items() if due <= now) == ticket:
+                        timeout = max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+                        if timeout == 0:
+                            self.requests.take(1)
+                            self.tokens.take(tokens)
+                            break
+                    else:
+                        # A backing-off ticket ahead of us may become due while we wait
+                        pending = [due - now for due in self._waiting.values() if due > now]
+                        timeout = min(pending) if pending else None
+                    self._condition.wait(timeout)
+            finally:
+                del self._waiting[ticket]
+                self._condition.notify_all()
+
+            waited = time.monotonic() - started
+            self._metrics["calls"] += 1
+            self._metrics["total_wait_seconds"] += waited
+            self._metrics["max_wait_seconds"] = max(self._metrics["max_wait_seconds"], waited)
+        metrics.observe("scheduler_wait_seconds", waited, priority=priority)
+
+    # Function to run a model call under the rate limits, retrying quota errors with backoff and jitter
+    # (`feature` labels the retry and failure metrics)
+    def run(self, call, priority=PRIORITY_NORMAL, tokens=1, feature="default"):
+        not_before = 0.0
+        for attempt in range(self.max_retries + 1):
+            self._acquire(priority, tokens, not_before)
+            try:
+                return call()
+            except RETRYABLE_ERRORS as e:
+                with self._condition:
+                    # The quota is used up (possibly by another process), so hold everyone back
+                    self.requests.drain()
+                    if attempt == self.max_retries:
+                        self._metrics["failures"] += 1
+                        metrics.increment("model_quota_failures_total", feature=feature)
+                        raise
+                    self._metrics["retries"] += 1
+                metrics.increment("model_retries_total", feature=feature, error=e.__class__.__name__)
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+                logger.warning("model call throttled (%s), retrying in %.1fs", e.__class__.__name__, delay)
+                # Requeue instead of sleeping, so the wait is visible in the queue and ordered by priority
+                not_before = time.monotonic() + delay
+
+    # Function to get a snapshot of the queue and wait-time metrics
+    def metrics(self):
+        with self._condition:
+            metrics = dict(self._metrics, queue_depth=len(self._waiting))
+        metrics["average_wait_seconds"] = metrics["total_wait_seconds"] / metrics["calls"] if metrics["calls"] else 0.0
+        return metrics
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+# Function to get the process-wide scheduler, configured from the environment on first use
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = CallScheduler(
+                rpm=int(os.getenv("MODEL_RPM", DEFAULT_RPM)),
+                tpm=int(os.getenv("MODEL_TPM", DEFAULT_TPM)),
+                max_retries=int(os.getenv("MODEL_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+            )
+        return _scheduler
+
+
+# Function to swap the process-wide scheduler (e.g. for benchmarks)
+def set_scheduler(scheduler):
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = scheduler
@@ -0,0 +1,114 @@
+# Map-reduce summarization for documents that are too large for one prompt
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from student_helper import llm
+
+# Default settings (characters per chunk and number of chunks summarized at once)
+DEFAULT_CHUNK_SIZE = 12000
+DEFAULT_MAX_WORKERS = 4
+
+# Separators tried in order when a piece of text is still bigger than a chunk:
+# page breaks, paragraphs, lines, sentences and finally words
+SEPARATORS = ["\f", "\n\n", "\n", ". ", " "]
+
+SUMMARY_PROMPT = "Summarize the following content in bullet points:\n\n{content}"
+MAP_PROMPT = ("Summarize part {index} of {total} of a larger document in concise bullet points. "
+              "Keep key facts, definitions and figures:\n\n{content}")
+REDUCE_PROMPT = ("The following bullet-point summaries cover consecutive parts of one document. "
+                 "Merge them into a single bullet-point summary of the whole document, "
+                 "keeping the original order and removing repetition:\n\n{content}")
+
+
+# Function to break a piece of text down until every part fits in a chunk
+def _split_piece(text, chunk_size, separators):
+    if len(text) <= chunk_size:
+        return [text]
+    if not separators:
+        return [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+    separator, remaining = separators[0], separators[1:]
+    parts = text.split(separator)
+    if len(parts) == 1:
+        return _split_piece(text, chunk_size, remaining)
+
+    pieces = []
+    for i, part in enumerate(parts):
+        if i < len(parts) - 1:
+            part += separator
+        pieces.extend(_split_piece(part, chunk_size, remaining))
+    return pieces
+
+
+# Function to split text into chunks on page/paragraph boundaries
+def split_into_chunks(text, chunk_size=DEFAULT_CHUNK_SIZE):
+    chunks = []
+    current, current_size = [], 0
+    for piece in _split_piece(text, chunk_size, SEPARATORS):
+        if current and current_size + len(piece) > chunk_size:
+            chunks.append("".join(current))
+            current, current_size = [], 0
+        current.append(piece)
+        current_size += len(piece)
+    if current:
+        chunks.append("".join(current))
+    return [chunk.strip() for chunk in chunks if chunk.strip()]
+
+
+# Function to run one prompt against the model (through the shared response cache)
+def _generate(model, prompt, mode, stream=False):
+    if stream:
+        return llm.stream_text(model, prompt, mode=mode)
+    return llm.generate_text(model, prompt, mode=mode)
+
+
+# Function to summarize one chunk; the chunk is only read (and its prompt built) when a worker picks it up
+def _summarize_chunk(model, chunks, index):
+    return _generate(model, MAP_PROMPT.format(index=index + 1, total=len(chunks), content=chunks[index]), "summarize_part")
+
+
+# Function to summarize chunks concurrently, yielding (index, summary) as each one finishes
+def summarize_chunks(model, chunks, max_workers=DEFAULT_MAX_WORKERS):
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(_summarize_chunk, model, chunks, i): i for i in range(len(chunks))}
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            # Don't keep spending quota on chunks nobody will read
+            for future in futures:
+                future.cancel()
+
+
+# Function to merge partial summaries into one, reducing in rounds if they don't fit in one prompt.
+# With stream=True the result is an iterator of text pieces from the final merge.
+def reduce_summaries(model, summaries, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=DEFAULT_MAX_WORKERS, stream=False):
+    summaries = [summary.strip() for summary in summaries if summary and summary.strip()]
+    if len(summaries) <= 1:
+        summary = summaries[0] if summaries else ""
+        return iter([summary]) if stream else summary
+
+    while True:
+        groups = split_into_chunks("\n\n".join(summaries), chunk_size)
+        if len(groups) == 1:
+            return _generate(model, REDUCE_PROMPT.format(content=groups[0]), "summarize_merge", stream)
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            merged = list(executor.map(lambda group: _generate(model, REDUCE_PROMPT.format(content=group), "summarize_merge"), groups))
+        # Stop if a round didn't make the summaries any shorter
+        if len(merged) >= len(summaries):
+            summary = "\n\n".join(merged)
+            return iter([summary]) if stream else summary
+        summaries = merged
+
+
+# Function to summarize a whole document (used when the caller doesn't need progress updates)
+def summarize_document(model, text, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=DEFAULT_MAX_WORKERS):
+    chunks = split_into_chunks(text, chunk_size)
+    if not chunks:
+        return ""
+    if len(chunks) == 1:
+        return _generate(model, SUMMARY_PROMPT.format(content=chunks[0]), "summarize")
+
+    partial = [None] * len(chunks)
+    for index, summary in summarize_chunks(model, chunks, max_workers):
+        partial[index] = summary
+    return reduce_summaries(model, partial, chunk_size, max_workers)
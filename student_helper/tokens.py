@@ -0,0 +1,7 @@
+# Offline token estimates for prompts and responses (roughly 4 characters per token for English text)
+CHARS_PER_TOKEN = 4
+
+
+# Function to estimate the number of tokens in a piece of text
+def estimate_tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN) if text else 0
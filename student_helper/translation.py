@@ -0,0 +1,194 @@
+# Segmented translation: sentences are translated in parallel batches and remembered per language,
+# so editing a long text only re-translates the sentences that changed
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from student_helper import llm
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "translation_memory.sqlite3")
+# Sentences kept in the memory; the least recently used ones are removed past this
+DEFAULT_MAX_ENTRIES = 200000
+# Characters of source text per request and requests running at once
+BATCH_CHARS = 1500
+MAX_WORKERS = 4
+
+# Sentence boundaries (kept, so the translation has the same layout as the source)
+BOUNDARY_PATTERN = re.compile(r"((?<=[.!?])\s+|\n\s*)")
+
+SINGLE_PROMPT = "Translate the following text to {language}:\n\n{text}"
+BATCH_PROMPT = ("Translate each numbered segment below to {language}. The segments are consecutive sentences of one text. "
+                "Reply with exactly one line per segment in the form <n>translation</n> and nothing else.\n\n{segments}")
+
+
+class TranslationMemory:
+    # Persistent (language, source sentence) -> translation store, pruned least recently used first
+    def __init__(self, path=DEFAULT_MEMORY_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS segments (language TEXT, source_hash TEXT, translation TEXT, "
+            "updated REAL, PRIMARY KEY (language, source_hash))"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS segments_updated ON segments (updated)")
+
+    @staticmethod
+    def _hash(segment):
+        return hashlib.sha256(" ".join(segment.split()).encode("utf-8")).hexdigest()
+
+    # Function to look up many segments at once; returns {segment: translation} for the ones found
+    def get_many(self, language, segments):
+        hashes = {self._hash(segment): segment for segment in segments}
+        found = {}
+        now = time.time()
+        with self._lock:
+            keys = list(hashes)
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._connection.execute(
+                    f"SELECT source_hash, translation FROM segments WHERE language = ? AND source_hash IN ({placeholders})",
+                    [language] + chunk,
+                ).fetchall()
+                if rows:
+                    # Mark the sentences as recently used so pruning keeps them
+                    self._connection.execute(
+                        f"UPDATE segments SET updated = ? WHERE language = ? AND source_hash IN ({placeholders})",
+                        [now, language] + chunk,
+                    )
+                found.update({hashes[source_hash]: translation for source_hash, translation in rows})
+        return found
+
+    def put_many(self, language, translations):
+        now = time.time()
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO segments (language, source_hash, translation, updated) VALUES (?, ?, ?, ?)",
+                [(language, self._hash(segment), translation, now) for segment, translation in translations.items()],
+            )
+            self._prune()
+
+    # Function to remove the least recently used sentences beyond max_entries
+    def _prune(self):
+        count = self._connection.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        if count > self.max_entries:
+            self._connection.execute(
+                "DELETE FROM segments WHERE rowid IN (SELECT rowid FROM segments ORDER BY updated LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+
+_memory = None
+_memory_lock = threading.Lock()
+
+
+# Function to get the process-wide translation memory
+def get_memory():
+    global _memory
+    with _memory_lock:
+        if _memory is None:
+            _memory = TranslationMemory(
+                os.getenv("TRANSLATION_MEMORY_PATH", DEFAULT_MEMORY_PATH),
+                max_entries=int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            )
+        return _memory
+
+
+# Function to replace the process-wide translation memory (e.g. an in-memory one for benchmarks)
+def set_memory(memory):
+    global _memory
+    with _memory_lock:
+        _memory = memory
+
+
+# Function to split text into alternating [sentence, separator, sentence, ...] parts
+def split_segments(text):
+    return BOUNDARY_PATTERN.split(text)
+
+
+# Function to group sentences into batches of roughly BATCH_CHARS characters
+def _batches(segments, batch_chars=BATCH_CHARS):
+    batch, size = [], 0
+    for segment in segments:
+        if batch and size + len(segment) > batch_chars:
+            yield batch
+            batch, size = [], 0
+        batch.append(segment)
+        size += len(segment)
+    if batch:
+        yield batch
+
+
+# Function to translate one batch of sentences, falling back to one request per sentence if the reply is garbled
+def _translate_batch(model, batch, language):
+    if len(batch) == 1:
+        return {batch[0]: llm.generate_text(model, SINGLE_PROMPT.format(language=language, text=batch[0]), mode="translate").strip()}
+
+    def parse(reply):
+        parts = dict(re.findall(r"<(\d+)>(.*?)</\1>", reply, re.DOTALL))
+        if len(parts) != len(batch) or any(str(i) not in parts for i in range(1, len(batch) + 1)):
+            raise ValueError("reply does not contain every numbered segment")
+        return [parts[str(i)].strip() for i in range(1, len(batch) + 1)]
+
+    numbered = "\n".join(f"<{i}>{segment}</{i}>" for i, segment in enumerate(batch, start=1))
+    try:
+        reply = llm.generate_text(model, BATCH_PROMPT.format(language=language, segments=numbered), mode="translate", validate=parse)
+        return dict(zip(batch, parse(reply)))
+    except ValueError:
+        translations = {}
+        for segment in batch:
+            translations.update(_translate_batch(model, [segment], language))
+        return translations
+
+
+# Function to translate text into several languages at once; returns ({language: translation}, failures).
+# A batch that fails leaves its sentences in the source language, and is reported in `failures`
+# as (language, sentences, error). `progress` (optional) is called with (finished requests, total requests).
+def translate(model, text, languages, memory=None, max_workers=MAX_WORKERS, progress=None):
+    memory = memory or get_memory()
+    parts = split_segments(text)
+    sentences = list(dict.fromkeys(part.strip() for part in parts[::2] if part.strip()))
+
+    known = {language: memory.get_many(language, sentences) for language in languages}
+    jobs = [(language, batch) for language in languages
+            for batch in _batches([s for s in sentences if s not in known[language]])]
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [(language, batch, executor.submit(_translate_batch, model, batch, language)) for language, batch in jobs]
+        failures = []
+        for done, (language, batch, future) in enumerate(futures, start=1):
+            try:
+                translations = future.result()
+            except Exception as e:
+                logger.warning("translation of %d sentence(s) to %s failed: %s", len(batch), language, e)
+                failures.append((language, batch, e))
+            else:
+                memory.put_many(language, translations)
+                known[language].update(translations)
+            if progress:
+                progress(done, len(futures))
+
+    results = {}
+    for language in languages:
+        output = []
+        for i, part in enumerate(parts):
+            if i % 2 == 1 or not part.strip():
+                output.append(part)
+            else:
+                # Keep the leading/trailing whitespace of the source sentence (and the sentence itself if it failed)
+                output.append(part[:len(part) - len(part.lstrip())] + known[language].get(part.strip(), part.strip())
+                              + part[len(part.rstrip()):])
+        results[language] = "".join(output)
+    return results, failures
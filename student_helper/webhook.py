@@ -0,0 +1,167 @@
+# Background delivery of user registrations to the Zapier webhook, shared by every page
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Default settings, overridable with environment variables
+DEFAULT_WEBHOOK_URL = "https://hooks.zapier.com/hooks/catch/19454215/22bv1r6/"
+DEFAULT_SPOOL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "webhook_spool.json")
+DEFAULT_TIMEOUT = 5.0  # seconds
+BATCH_SIZE = 50
+BATCH_WAIT = 2.0  # seconds spent collecting a batch after the first name arrives
+BASE_DELAY = 2.0
+MAX_DELAY = 300.0
+MAX_SPOOLED = 1000
+
+
+class WebhookDelivery:
+    # Queues names and posts them in de-duplicated batches from a daemon thread
+    def __init__(self, url=DEFAULT_WEBHOOK_URL, spool_path=DEFAULT_SPOOL_PATH, timeout=DEFAULT_TIMEOUT,
+                 batch_size=BATCH_SIZE, batch_wait=BATCH_WAIT):
+        self.url = url
+        self.spool_path = spool_path
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.delivered = 0
+        self.failed_attempts = 0
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._queue = queue.Queue()
+        self._seen = set()
+        self._seen_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="webhook-delivery", daemon=True)
+        self._thread.start()
+
+    # Function to queue a name for delivery; returns immediately
+    def submit(self, name):
+        with self._seen_lock:
+            if name in self._seen:
+                return
+            if len(self._seen) >= 10 * MAX_SPOOLED:
+                self._seen.clear()
+            self._seen.add(name)
+        self._queue.put(name)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    # Function to load names that couldn't be delivered before the last restart
+    def _load_spool(self):
+        try:
+            with open(self.spool_path, encoding="utf-8") as f:
+                return list(json.load(f))
+        except (OSError, ValueError):
+            return []
+
+    # Function to save the undelivered names (replacing the file atomically)
+    def _write_spool(self, names):
+        try:
+            if not names:
+                if os.path.exists(self.spool_path):
+                    os.remove(self.spool_path)
+                return
+            os.makedirs(os.path.dirname(self.spool_path) or ".", exist_ok=True)
+            temporary_path = self.spool_path + ".tmp"
+            with open(temporary_path, "w", encoding="utf-8") as f:
+                json.dump(names[-MAX_SPOOLED:], f)
+            os.replace(temporary_path, self.spool_path)
+        except OSError as e:
+            logger.warning("could not write webhook spool: %s", e)
+
+    def _send(self, names):
+        try:
+            response = self.session.post(self.url, json=[{"name": name} for name in names], timeout=self.timeout)
+            response.raise_for_status()
+            self.delivered += len(names)
+            return True
+        except requests.exceptions.RequestException as e:
+            self.failed_attempts += 1
+            logger.warning("failed to deliver %d name(s) to the webhook: %s", len(names), e)
+            return False
+
+    def _run(self):
+        batch = self._load_spool()[-MAX_SPOOLED:]
+        failures = 0
+        retry_at = 0.0
+        while True:
+            # Wait for a name, or until the batch is due (after the backoff, if the last attempt failed)
+            wait = None if not batch else max(0.0, retry_at - time.monotonic())
+            try:
+                batch.append(self._queue.get(timeout=wait))
+            except queue.Empty:
+                pass
+
+            # Still backing off: keep collecting names, but don't send yet
+            if time.monotonic() < retry_at:
+                batch = self._limit(batch)
+                continue
+
+            # Give other registrations a moment to join the batch
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            batch = list(dict.fromkeys(batch))
+            if self._send(batch[:self.batch_size]):
+                batch = batch[self.batch_size:]
+                failures = 0
+                retry_at = 0.0
+            else:
+                failures += 1
+                retry_at = time.monotonic() + min(MAX_DELAY, BASE_DELAY * 2 ** failures) * random.uniform(0.5, 1.0)
+            batch = self._limit(batch)
+            self._write_spool(batch)
+
+    # Function to de-duplicate the pending names and keep only the newest MAX_SPOOLED of them
+    def _limit(self, batch):
+        batch = list(dict.fromkeys(batch))
+        if len(batch) > MAX_SPOOLED:
+            logger.warning("webhook backlog full, dropping %d oldest name(s)", len(batch) - MAX_SPOOLED)
+            batch = batch[-MAX_SPOOLED:]
+        return batch
+
+
+_delivery = None
+_delivery_lock = threading.Lock()
+
+
+# Function to get the process-wide delivery queue, configured from the environment on first use
+def get_delivery():
+    global _delivery
+    with _delivery_lock:
+        if _delivery is None:
+            _delivery = WebhookDelivery(
+                url=os.getenv("ZAPIER_WEBHOOK_URL", DEFAULT_WEBHOOK_URL),
+                spool_path=os.getenv("ZAPIER_SPOOL_PATH", DEFAULT_SPOOL_PATH),
+                timeout=float(os.getenv("ZAPIER_TIMEOUT", DEFAULT_TIMEOUT)),
+            )
+        return _delivery
+
+
+# Function to register a user's name without blocking the page (blank names are ignored)
+def register_name(name):
+    name = name.strip()
+    if not name:
+        return False
+    get_delivery().submit(name)
+    return True